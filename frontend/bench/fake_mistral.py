@@ -0,0 +1,113 @@
+"""Local stand-in for the Mistral chat API, for offline load testing.
+
+Implements ``POST /v1/chat/completions`` in both plain and streaming (SSE)
+mode with configurable latency, token rate and error rate. Start it with::
+
+    python bench/fake_mistral.py --port 8100 --ttft 0.4 --tokens-per-second 60
+
+and run the app with ``MISTRAL_SERVER_URL=http://127.0.0.1:8100``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI()
+config = argparse.Namespace(ttft=0.4, tokens_per_second=60.0, completion_tokens=800, error_rate=0.0, seed=None)
+
+WORDS = (
+    "question answer explain describe compare transaction protocol lock commit "
+    "replica leader log consensus latency throughput serializable snapshot"
+).split()
+
+
+def _completion_text(model: str, messages: list) -> list[str]:
+    """Deterministic pseudo-exam text; classification prompts get a single label."""
+    prompt = messages[-1].get("content", "") if messages else ""
+    if "small" in model and '"slide" or "test"' in prompt:
+        # Judge only the document, not the instructions around it, which mention exams themselves.
+        content = prompt.split("**CONTENT TO ANALYZE:**", 1)[-1].split("**IMPORTANT:**", 1)[0]
+        return ["test" if re.search(r"\b(exam|question)", content, re.IGNORECASE) else "slide"]
+    rng = random.Random(len(prompt))
+    tokens = []
+    for i in range(config.completion_tokens):
+        if i % 40 == 0:
+            tokens.append(f"\n\n**Question {i // 40 + 1}.** ")
+        tokens.append(rng.choice(WORDS) + " ")
+    return tokens
+
+
+def _usage(messages: list, completion: list[str]) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": len(completion), "total_tokens": prompt_tokens + len(completion)}
+
+
+def _chunk(completion_id: str, model: str, content: str, finish_reason=None) -> str:
+    payload = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "mistral-large-latest")
+    messages = body.get("messages", [])
+    if random.random() < config.error_rate:
+        status = random.choice([429, 503])
+        return JSONResponse({"object": "error", "message": "Simulated upstream failure"}, status_code=status)
+
+    completion = _completion_text(model, messages)
+    completion_id = uuid.uuid4().hex
+    if not body.get("stream"):
+        await asyncio.sleep(config.ttft + len(completion) / config.tokens_per_second)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(completion)}, "finish_reason": "stop"}],
+            "usage": _usage(messages, completion),
+        }
+
+    async def events():
+        await asyncio.sleep(config.ttft)
+        for token in completion:
+            yield _chunk(completion_id, model, token)
+            await asyncio.sleep(1 / config.tokens_per_second)
+        yield _chunk(completion_id, model, "", "stop")
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ttft", type=float, default=config.ttft, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=config.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=config.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate, help="Fraction of calls answered with 429/503")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    vars(config).update({k: v for k, v in vars(args).items() if k in vars(config)})
+    if args.seed is not None:
+        random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""End-to-end load benchmark for the exam generator.
+
+Drives ``POST /generate-exam`` and the Reflex upload, question and exam
+events with N concurrent simulated sessions over a fixed PDF corpus, and
+reports p50/p95/p99 latency, time to first token, throughput and worker RSS.
+
+Run fully offline against ``bench/fake_mistral.py``::
+
+    python bench/fake_mistral.py --port 8100 &
+    MISTRAL_SERVER_URL=http://127.0.0.1:8100 MISTRAL_API_KEY=fake reflex run &
+    python bench/load.py --sessions 20 --worker-pid "$(pgrep -f 'reflex run' | head -1)"
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import time
+import uuid
+
+import httpx
+
+# Reflex 0.8 names substates by their full module path.
+DEFAULT_STATE = "reflex___state____state.frontend___states___state____state"
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.samples.setdefault(name, []).append(seconds)
+
+    def error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        def pct(values: list[float], q: float) -> float:
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+        report = {}
+        for name, values in sorted(self.samples.items()):
+            report[name] = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "p50": pct(values, 0.50),
+                "p95": pct(values, 0.95),
+                "p99": pct(values, 0.99),
+                "mean": statistics.fmean(values),
+                "per_second": len(values) / elapsed if elapsed else 0.0,
+            }
+        for name, count in self.errors.items():
+            report.setdefault(name, {"count": 0, "errors": count})
+        return report
+
+
+class RssSampler:
+    """Samples a worker's resident set size from /proc while the run is going."""
+
+    def __init__(self, pid: int | None, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[int] = []
+
+    def read(self) -> int | None:
+        try:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            return None
+        return None
+
+    async def run(self) -> None:
+        while self.pid:
+            rss = self.read()
+            if rss is not None:
+                self.samples.append(rss)
+            await asyncio.sleep(self.interval)
+
+    def report(self) -> dict:
+        if not self.samples:
+            return {}
+        mib = 1024 * 1024
+        return {"start_mib": self.samples[0] / mib, "peak_mib": max(self.samples) / mib, "end_mib": self.samples[-1] / mib}
+
+
+async def api_session(http: httpx.AsyncClient, base_url: str, corpus: list[str], recorder: Recorder) -> None:
+    files = [("files", (os.path.basename(path), open(path, "rb"), "application/pdf")) for path in corpus]
+    started = time.perf_counter()
+    first = None
+    try:
+        async with http.stream("POST", f"{base_url}/generate-exam", files=files) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_text():
+                if chunk and first is None:
+                    first = time.perf_counter()
+                    recorder.add("api.generate_exam.ttft", first - started)
+        recorder.add("api.generate_exam.total", time.perf_counter() - started)
+    except Exception:
+        recorder.error("api.generate_exam.total")
+    finally:
+        for _, (_, handle, _) in files:
+            handle.close()
+
+
+def _has_update(update: dict, var: str, value) -> bool:
+    """Whether a Reflex state update sets ``var`` (in any substate) to ``value``."""
+    return any(
+        key.startswith(var) and new_value == value
+        for delta in update.get("delta", {}).values()
+        for key, new_value in delta.items()
+    )
+
+
+async def reflex_session(base_url: str, state: str, corpus: list[str], question: str, recorder: Recorder, timeout: float) -> None:
+    import socketio
+
+    token = str(uuid.uuid4())
+    sio = socketio.AsyncClient()
+    waiters: list[tuple[str, bool, asyncio.Future]] = []
+
+    @sio.on("event")
+    async def on_event(message):
+        update = json.loads(message) if isinstance(message, str) else message
+        for waiter in list(waiters):
+            var, expected, future = waiter
+            if _has_update(update, var, expected) and not future.done():
+                future.set_result(time.perf_counter())
+                waiters.remove(waiter)
+
+    def wait_for(var: str, value: bool) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        waiters.append((var, value, future))
+        return future
+
+    async def emit(handler: str, payload: dict) -> None:
+        await sio.emit(
+            "event",
+            {"token": token, "name": f"{state}.{handler}", "payload": payload, "router_data": {"pathname": "/", "query": {}}},
+        )
+
+    async def timed(name: str, var: str, action) -> None:
+        done = wait_for(var, False)
+        started = time.perf_counter()
+        try:
+            await action()
+            recorder.add(name, await asyncio.wait_for(done, timeout) - started)
+        except Exception:
+            recorder.error(name)
+
+    await sio.connect(base_url, socketio_path="/_event", transports=["websocket"])
+    try:
+        async def upload() -> None:
+            name = "reflex.handle_upload"
+            files = [("files", (os.path.basename(path), open(path, "rb"), "application/pdf")) for path in corpus]
+            started = time.perf_counter()
+            try:
+                async with httpx.AsyncClient(timeout=timeout) as http:
+                    async with http.stream(
+                        "POST",
+                        f"{base_url}/_upload",
+                        files=files,
+                        headers={"Reflex-Client-Token": token, "Reflex-Event-Handler": f"{state}.handle_upload"},
+                    ) as response:
+                        response.raise_for_status()
+                        # Reflex streams an upload handler's updates back in this
+                        # response as NDJSON, not over the socket.
+                        async for line in response.aiter_lines():
+                            if line.strip() and _has_update(json.loads(line), "is_uploading", False):
+                                recorder.add(name, time.perf_counter() - started)
+                                return
+                recorder.error(name)
+            except Exception:
+                recorder.error(name)
+            finally:
+                for _, (_, handle, _) in files:
+                    handle.close()
+
+        await upload()
+        await timed("reflex.process_question", "processing", lambda: emit("answer", {"form_data": {"question": question}}))
+        await timed("reflex.generate_exam", "processing", lambda: emit("generate_exam", {}))
+    finally:
+        await sio.disconnect()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--scenario", choices=["api", "reflex", "all"], default="all")
+    parser.add_argument("--corpus", default="uploaded_files/*.pdf", help="Glob of PDFs uploaded by every session")
+    parser.add_argument("--question", default="What are the main topics covered?")
+    parser.add_argument("--state", default=DEFAULT_STATE, help="Full Reflex name of the app State")
+    parser.add_argument("--worker-pid", type=int, default=None, help="PID whose RSS is sampled during the run")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    corpus = sorted(glob.glob(args.corpus))
+    if not corpus:
+        parser.error(f"No files match {args.corpus}")
+    recorder = Recorder()
+    sampler = RssSampler(args.worker_pid)
+    sampling = asyncio.create_task(sampler.run())
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(timeout=args.timeout) as http:
+        sessions = []
+        if args.scenario in ("api", "all"):
+            sessions += [api_session(http, args.base_url, corpus, recorder) for _ in range(args.sessions)]
+        if args.scenario in ("reflex", "all"):
+            sessions += [
+                reflex_session(args.base_url, args.state, corpus, args.question, recorder, args.timeout)
+                for _ in range(args.sessions)
+            ]
+        await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - started
+    sampling.cancel()
+
+    report = {"sessions": args.sessions, "elapsed_seconds": elapsed, "latency": recorder.report(elapsed), "worker_rss": sampler.report()}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{args.sessions} sessions in {elapsed:.1f}s")
+    for name, stats in report["latency"].items():
+        if not stats["count"]:
+            print(f"  {name:32} errors={stats['errors']}")
+            continue
+        print(
+            f"  {name:32} n={stats['count']:<4} err={stats['errors']:<3} "
+            f"p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s p99={stats['p99']:.3f}s {stats['per_second']:.2f}/s"
+        )
+    if report["worker_rss"]:
+        rss = report["worker_rss"]
+        print(f"  worker RSS: start={rss['start_mib']:.0f} MiB peak={rss['peak_mib']:.0f} MiB end={rss['end_mib']:.0f} MiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,96 @@
+"""Cold-start benchmark for the app module.
+
+Imports the app in fresh interpreters and reports the median wall time, the
+slowest imports (from ``python -X importtime``) and whether any heavy
+dependency was loaded at import time. Exits non-zero when the median exceeds
+``--max-seconds`` or a forbidden module is imported, so it can guard against
+startup regressions in CI::
+
+    python bench/startup.py --runs 5 --max-seconds 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Only needed once a PDF is extracted or an LLM call is made.
+HEAVY_MODULES = ["pymupdf", "fitz", "pdfplumber", "mistralai", "markdown2"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started, "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_once(module: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            imports.append((int(parts[1]), parts[2].rstrip()))
+    probe["imports"] = imports
+    return probe
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="frontend.frontend")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fail if the median import time exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=HEAVY_MODULES, help="Modules that must not load at import time")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    runs = [run_once(args.module) for _ in range(args.runs)]
+    median = statistics.median(run["seconds"] for run in runs)
+    # Top-level imports are the least indented lines of the last run.
+    top = sorted(
+        ((us, name.strip()) for us, name in runs[-1]["imports"] if not name.startswith("  ")),
+        reverse=True,
+    )[: args.top]
+    loaded = sorted({name.split(".")[0] for name in runs[-1]["modules"]} & set(args.forbid))
+
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "median_seconds": median,
+        "min_seconds": min(run["seconds"] for run in runs),
+        "slowest_imports": [{"module": name, "cumulative_ms": us / 1000} for us, name in top],
+        "heavy_modules_loaded": loaded,
+        "elapsed_seconds": time.perf_counter() - started,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"import {args.module}: median={median:.3f}s min={report['min_seconds']:.3f}s over {args.runs} runs")
+        for entry in report["slowest_imports"]:
+            print(f"  {entry['cumulative_ms']:9.1f} ms  {entry['module']}")
+        if loaded:
+            print(f"  heavy modules loaded at import: {', '.join(loaded)}")
+
+    failed = bool(loaded)
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"median import time {median:.3f}s exceeds {args.max_seconds:.3f}s", file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,30 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import FileResponse, StreamingResponse
-import os
-import pymupdf as fitz
-from mistralai import Mistral
+from fastapi import FastAPI, UploadFile, File, Request, HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import asyncio
+from contextlib import aclosing
+import hashlib
 import logging
-import reflex as rx
-from frontend.states.state import ChatMessage
+import time
+from typing import Literal, Optional
+from frontend.services.classifier import heuristic_classify
+from frontend.services.document_store import DocumentMeta, document_store, is_document_id
+from frontend.services.exam_jobs import MAX_EXAMS_PER_JOB, load_job, submit_job
+from frontend.services.exporting import EXPORT_MAX_CHARS, EXPORT_TIMEOUT, export_exam_pdf
+from frontend.services.extraction import extract_pages
+from frontend.services.extraction_cache import extraction_cache
+from frontend.services.llm import client, queue_stats
+from frontend.services.messages import ChatMessage
+from frontend.services.metrics import Trace, render_metrics
+from frontend.services.preprocess import normalize_pages
+from frontend.services.replay import ReplayGap, format_sse, replay_store
+from frontend.services.response_cache import cache_key, response_cache
+from frontend.services.retrieval import index_document
+from frontend.services.streaming import FirstTokenTimeout, coalesce, stream_chat
+from frontend.services.tokens import CHARS_PER_TOKEN, count_tokens
+from frontend.services.uploads import SpooledUpload, UploadTooLarge, spool_upload
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel, Field
 load_dotenv()
 
 api = FastAPI()
@@ -21,21 +37,23 @@ api.add_middleware(
 )
 
 MODEL_NAME = "mistral-large-latest"
+# Cache-key version of the prompt assembled in exam_generator (the upload-and-generate flow).
+GENERATE_EXAM_PROMPT_VERSION = "generate-exam-v1"
 
-mistral_api_key = os.getenv("MISTRAL_API_KEY")
-if not mistral_api_key:
-    logging.warning(
-        "MISTRAL_API_KEY environment variable not set. Exam generation will not work."
-    )
-    mistral_client = None
-else:
-    mistral_client = Mistral(api_key=mistral_api_key)
+mistral_client = client if client.configured else None
+
+async def exam_generator(pdf_texts: list[str], request: Request | None = None, trace: Trace | None = None):
+    """Generator function to stream the exam from MistralAI.
 
-async def exam_generator(pdf_texts: list[str]):
-    """Generator function to stream the exam from MistralAI."""
+    Deltas are coalesced before being written out, and the upstream stream is
+    cancelled as soon as the HTTP client goes away.
+    """
+    trace = trace or Trace("exam_generator")
     if not mistral_client:
         yield "Error: MistralAI client is not configured on the server."
+        trace.log(outcome="unconfigured")
         return
+    prompt_started = time.perf_counter()
     prompt_parts = [
         "You are an expert in creating educational materials. Your task is to generate a multiple-choice exam based on the provided PDF documents.",
         "The first document is an example of a previous exam, which you should use to understand the desired format, style, and difficulty.",
@@ -51,30 +69,230 @@ async def exam_generator(pdf_texts: list[str]):
     )
     full_prompt = "\n".join(prompt_parts)
     messages = [ChatMessage(role="user", content=full_prompt)]
+    doc_ids = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in pdf_texts]
+    key = cache_key(doc_ids, GENERATE_EXAM_PROMPT_VERSION, MODEL_NAME, None)
+    trace.record("prompt_assembly", time.perf_counter() - prompt_started)
+    trace.tokens(prompt=count_tokens(full_prompt))
+    outcome = "ok"
+    response_chars = 0
+    stream_started = time.perf_counter()
+    first_chunk_at = None
     try:
-        for chunk in mistral_client.chat_stream(model=MODEL_NAME, messages=messages):
-            if chunk.choices[0].delta.content is not None:
-                yield chunk.choices[0].delta.content
-                await asyncio.sleep(0.01)
+        shared = response_cache.stream(key, lambda: stream_chat(mistral_client, MODEL_NAME, messages))
+        async with aclosing(coalesce(shared)) as chunks:
+            async for text in chunks:
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                    trace.record("upstream_ttft", first_chunk_at - stream_started)
+                if request is not None and await request.is_disconnected():
+                    logging.info("Client disconnected, cancelling exam generation")
+                    outcome = "disconnected"
+                    return
+                response_chars += len(text)
+                yield text
+    except FirstTokenTimeout as e:
+        outcome = "ttft_timeout"
+        logging.warning(str(e))
+        yield f"Error: MistralAI did not start responding in time. {e}"
     except Exception as e:
+        outcome = "error"
         error_message = f"An error occurred while communicating with MistralAI: {e}"
         logging.exception(error_message)
         yield error_message
+    finally:
+        if first_chunk_at is not None:
+            trace.record("streaming", time.perf_counter() - first_chunk_at)
+        trace.tokens(response=response_chars // CHARS_PER_TOKEN)
+        trace.log(outcome=outcome)
+
+
+
+async def sse_events(generation_id: str, last_event_id: int):
+    try:
+        async for event in replay_store.events(generation_id, last_event_id):
+            # Comment lines keep proxies and mobile networks from closing an idle stream.
+            yield ": keepalive\n\n" if event is None else format_sse(event)
+    except ReplayGap as e:
+        yield f"event: error\ndata: {e}\n\n"
+
+
+def sse_response(generation_id: str, last_event_id: int) -> StreamingResponse:
+    return StreamingResponse(
+        sse_events(generation_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
+async def _read_pages(upload: SpooledUpload, trace: Trace) -> tuple[list[str], Optional[str]]:
+    """Raw pages of an uploaded PDF and its cached classification, if any."""
+    cached = extraction_cache.get(upload.digest)
+    if cached is not None:
+        return cached["pages"], cached["classification"]
+    with trace.span("extract_pymupdf"):
+        pages = await extract_pages(upload.path)
+    extraction_cache.put(upload.digest, pages)
+    return pages, None
+
 
 @api.post("/generate-exam")
-async def generate_exam_endpoint(files: list[UploadFile] = File(...)):
+async def generate_exam_endpoint(request: Request, files: list[UploadFile] = File(...), sse: bool = False):
+    """Stream a new exam generated from the uploaded PDFs.
+
+    With ``?sse=true`` (or ``Accept: text/event-stream``) the generation runs
+    detached from this connection and is sent as server-sent events; a client
+    that drops can resume it from ``GET /generate-exam/{generation_id}``.
+    """
+    trace = Trace("generate_exam_endpoint", files=len(files))
     pdf_texts = []
     for file in files:
         try:
-            file_bytes = await file.read()
-            with fitz.open(stream=file_bytes, filetype="pdf") as doc:
-                text = "".join((page.get_text() for page in doc))
-                pdf_texts.append(text)
+            with trace.span("read_file"):
+                upload = await spool_upload(file, file.filename or "upload.pdf")
+            pages, _ = await _read_pages(upload, trace)
+            with trace.span("normalize"):
+                normalized = normalize_pages(pages)
+            trace.normalized(normalized.tokens_before, normalized.tokens_after)
+            pdf_texts.append("\n".join(normalized.pages))
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
         except Exception as e:
             logging.exception(f"Failed to process PDF file: {file.filename}")
             pass
-    return StreamingResponse(exam_generator(pdf_texts), media_type="text/plain")
+    if sse or "text/event-stream" in request.headers.get("accept", ""):
+        generation_id = replay_store.start(lambda: exam_generator(pdf_texts, None, trace))
+        return sse_response(generation_id, 0)
+    return StreamingResponse(exam_generator(pdf_texts, request, trace), media_type="text/plain")
+
+
+@api.get("/generate-exam/{generation_id}")
+async def resume_exam_endpoint(generation_id: str, request: Request, last_event_id: int | None = None):
+    """Resume a detached generation after the ``Last-Event-ID`` header (or ``?last_event_id=``)."""
+    if not replay_store.exists(generation_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired generation ID")
+    header = request.headers.get("last-event-id", "")
+    if last_event_id is None:
+        last_event_id = int(header) if header.isdigit() else 0
+    return sse_response(generation_id, last_event_id)
+
+@api.post("/documents")
+async def upload_documents_endpoint(files: list[UploadFile] = File(...), kind: Literal["slide", "test"] | None = None):
+    """Store uploaded PDFs for ``POST /exam-jobs`` and return their document IDs.
+
+    Each file is filed as lecture slides (``"slide"``) or a past exam
+    (``"test"``) from its layout, unless ``?kind=`` says what the whole upload is.
+    """
+    trace = Trace("upload_documents_endpoint", files=len(files))
+    documents: list[DocumentMeta] = []
+    try:
+        for file in files:
+            name = file.filename or "upload.pdf"
+            try:
+                with trace.span("read_file"):
+                    upload = await spool_upload(file, name)
+                pages, classification = await _read_pages(upload, trace)
+            except UploadTooLarge as e:
+                raise HTTPException(status_code=413, detail=str(e))
+            except Exception:
+                logging.exception(f"Failed to process PDF file: {name}")
+                raise HTTPException(status_code=422, detail=f"Could not read {name}")
+            document_kind = kind or classification or heuristic_classify("\n".join(pages))[0]
+            with trace.span("normalize"):
+                normalized = normalize_pages(pages, document_kind)
+            trace.normalized(normalized.tokens_before, normalized.tokens_after)
+            text = "\n".join(normalized.pages)
+            if not text:
+                raise HTTPException(status_code=422, detail=f"No text found in {name}")
+            with trace.span("index"):
+                document_store.put(upload.digest, text)
+                index_document(upload.digest, text)
+            documents.append({"id": upload.digest, "name": name, "kind": document_kind, "chars": len(text)})
+    finally:
+        trace.log(documents=len(documents))
+    return {"documents": documents}
+
+
+class ExamJobRequest(BaseModel):
+    slide_ids: list[str]
+    exam_ids: list[str]
+    count: int = Field(1, ge=1, le=MAX_EXAMS_PER_JOB)
+    mode: Literal["generate", "bank"] = "generate"
+
+
+@api.post("/exam-jobs")
+async def submit_exam_job_endpoint(body: ExamJobRequest):
+    """Queue generation of ``count`` exams from stored documents; returns a job ID to poll."""
+    if not mistral_client:
+        raise HTTPException(status_code=503, detail="MistralAI client is not configured on the server.")
+    if not body.slide_ids or not body.exam_ids:
+        raise HTTPException(status_code=400, detail="At least one slide and one exam document are required.")
+    invalid = [doc_id for doc_id in body.slide_ids + body.exam_ids if not is_document_id(doc_id)]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid document IDs: {', '.join(invalid)}")
+    missing = [doc_id for doc_id in body.slide_ids + body.exam_ids if document_store.get_text(doc_id) is None]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Unknown document IDs: {', '.join(missing)}")
+    job = submit_job(body.slide_ids, body.exam_ids, body.count, body.mode)
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+@api.get("/exam-jobs/{job_id}")
+async def exam_job_endpoint(job_id: str):
+    job = load_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job ID")
+    return job
+
+
+class ExamExportRequest(BaseModel):
+    markdown: str = Field(..., min_length=1, max_length=EXPORT_MAX_CHARS)
+
+
+async def _pdf_response(markdown: str) -> FileResponse:
+    try:
+        path = await export_exam_pdf(markdown)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"Rendering the PDF took longer than {EXPORT_TIMEOUT:.0f}s")
+    return FileResponse(path, media_type="application/pdf", filename="exam.pdf")
+
+
+@api.post("/export-exam")
+async def export_exam_endpoint(body: ExamExportRequest):
+    """Render a generated exam's markdown to PDF; repeat exports come straight from disk."""
+    return await _pdf_response(body.markdown)
+
+
+@api.get("/exam-jobs/{job_id}/exams/{index}/pdf")
+async def export_job_exam_endpoint(job_id: str, index: int):
+    job = load_job(job_id)
+    if job is None or not 0 <= index < job["count"]:
+        raise HTTPException(status_code=404, detail="Unknown job or exam")
+    markdown = job["exams"][index]
+    if markdown is None:
+        raise HTTPException(status_code=409, detail="This exam has not been generated yet")
+    return await _pdf_response(markdown)
+
+
+@api.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus histograms of per-stage latency and token counts."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@api.get("/llm-queue-stats")
+async def llm_queue_stats_endpoint():
+    """How long Mistral calls wait for a concurrency slot, per model tier."""
+    return queue_stats()
 
-__all__ = ["generate_exam_endpoint"]
\ No newline at end of file
+__all__ = [
+    "generate_exam_endpoint",
+    "resume_exam_endpoint",
+    "upload_documents_endpoint",
+    "submit_exam_job_endpoint",
+    "exam_job_endpoint",
+    "export_exam_endpoint",
+    "export_job_exam_endpoint",
+    "metrics_endpoint",
+    "llm_queue_stats_endpoint",
+]
\ No newline at end of file
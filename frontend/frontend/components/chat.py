@@ -57,6 +57,7 @@ def chat_input() -> rx.Component:
                                 class_name="p-2.5 rounded-lg border border-gray-300 bg-white hover:bg-gray-50 cursor-pointer",
                             ),
                             id="upload-pdf",
+                            multiple=True,
                             on_drop=State.handle_upload(
                                 rx.upload_files(upload_id="upload-pdf")
                             ),
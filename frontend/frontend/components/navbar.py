@@ -1,4 +1,5 @@
 import reflex as rx
+from frontend.services.exam_jobs import MAX_EXAMS_PER_JOB
 from frontend.states.state import State
 
 
@@ -9,23 +10,54 @@ def navbar() -> rx.Component:
             rx.el.p("PDF Assistant & Exam Generator", class_name="font-semibold text-lg"),
             class_name="flex items-center gap-3",
         ),
-        # Right side: Generate Exam button
-        rx.el.button(
-             rx.cond(
-                State.processing,
-                rx.spinner(class_name="mr-4 size-5 text-white"),
-                rx.icon("file-text", class_name="size-6 mr-4 text-white")
+        # Right side: question bank toggle, Generate Exam and batch generation
+        rx.el.div(
+            rx.checkbox(
+                "Reuse question bank",
+                checked=State.reuse_question_bank,
+                on_change=State.set_reuse_question_bank,
+                disabled=State.processing,
+            ),
+            rx.el.button(
+                 rx.cond(
+                    State.processing,
+                    rx.spinner(class_name="mr-4 size-5 text-white"),
+                    rx.icon("file-text", class_name="size-6 mr-4 text-white")
+                ),
+                rx.cond(
+                    State.processing,  # Only show text when not processing
+                    "",
+                    "Generate Exam"
+                ),
+                loading=State.processing,
+                class_name="p-2 text-white rounded-lg bg-gray-900 hover:bg-gray-700 flex items-center",
+                variant="solid",
+                on_click=State.generate_exam,
+                disabled=(State.uploaded_pdf.strip() == "") | State.processing | State.is_uploading,
             ),
-            rx.cond(
-                State.processing,  # Only show text when not processing
-                "",
-                "Generate Exam"
+            rx.el.div(
+                rx.el.input(
+                    type="number",
+                    min=1,
+                    max=MAX_EXAMS_PER_JOB,
+                    value=State.exam_count,
+                    on_change=State.set_exam_count,
+                    disabled=State.job_running,
+                    class_name="w-16 p-2 text-sm rounded-lg border border-gray-300",
+                ),
+                rx.el.button(
+                    rx.cond(
+                        State.job_running,
+                        f"Generating {State.job_completed}/{State.job_count}",
+                        "Generate exams",
+                    ),
+                    class_name="p-2 text-white rounded-lg bg-gray-900 hover:bg-gray-700 flex items-center",
+                    on_click=State.submit_exam_job,
+                    disabled=(State.uploaded_pdf.strip() == "") | State.processing | State.is_uploading | State.job_running,
+                ),
+                class_name="flex items-center gap-2",
             ),
-            loading=State.processing,
-            class_name="p-2 text-white rounded-lg bg-gray-900 hover:bg-gray-700 flex items-center",
-            variant="solid",
-            on_click=State.generate_exam,
-            disabled=(State.uploaded_pdf.strip() == "") | State.processing | State.is_uploading,
+            class_name="flex items-center gap-4",
         ),
         class_name="w-full flex justify-between items-center py-3 px-6 border-b border-gray-200",
     )
\ No newline at end of file
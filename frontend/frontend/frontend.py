@@ -56,5 +56,6 @@ app = rx.App(
     ],
     theme=rx.theme(appearance="light"),
 )
-app.add_page(index, route="/")
+# Resumes following an exam job started before a reload.
+app.add_page(index, route="/", on_load=State.poll_exam_job)
 
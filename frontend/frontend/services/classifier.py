@@ -0,0 +1,46 @@
+import os
+import re
+
+CONFIDENCE_THRESHOLD = float(os.getenv("CLASSIFIER_CONFIDENCE_THRESHOLD", "0.75"))
+
+_QUESTION_NUMBER = re.compile(r"^\s*(?:q(?:uestion)?\s*\d+|problem\s+\d+|\d{1,2}\s*[.)]\s+\S.*\?)", re.IGNORECASE | re.MULTILINE)
+_POINTS = re.compile(r"[(\[]\s*\d+\s*(?:points?|pts?|marks?)\s*[)\]]|\b\d+\s*(?:points|marks)\b", re.IGNORECASE)
+_ANSWER_OPTION = re.compile(r"^\s*(?:\(?[a-e]\)|[a-e]\.)\s+\S", re.IGNORECASE | re.MULTILINE)
+_EXAM_WORDS = re.compile(
+    r"\b(?:exam|quiz|midterm|final|test|minutes|answer|explain|justify|name\s*:|student\s*(?:id|number)|write down|show your work)\b",
+    re.IGNORECASE,
+)
+_BULLET = re.compile(r"^\s*(?:[•▪●◦‣–\-*])\s+\S", re.MULTILINE)
+_SLIDE_WORDS = re.compile(r"\b(?:lecture|slide|outline|agenda|overview|summary|recap|today|learning objectives)\b", re.IGNORECASE)
+
+
+def heuristic_classify(text: str) -> tuple[str, float]:
+    """Classify a document as "slide" or "test" from its layout alone.
+
+    Returns the label and a confidence in [0.5, 1.0]; callers should fall
+    back to the LLM below ``CONFIDENCE_THRESHOLD``.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return "slide", 0.5
+
+    test_score = (
+        3.0 * len(_QUESTION_NUMBER.findall(text))
+        + 3.0 * len(_POINTS.findall(text))
+        + 1.0 * len(_ANSWER_OPTION.findall(text))
+        + 0.5 * len(_EXAM_WORDS.findall(text))
+        + 2.0 * text.count("?")
+    )
+    slide_score = (
+        1.0 * len(_BULLET.findall(text))
+        + 1.0 * len(_SLIDE_WORDS.findall(text))
+        # Slides are dominated by short lines; exams by running prose.
+        + 0.05 * sum(1 for line in lines if len(line.split()) <= 6)
+    )
+
+    total = test_score + slide_score
+    if total == 0:
+        return "slide", 0.5
+    if test_score >= slide_score:
+        return "test", test_score / total
+    return "slide", slide_score / total
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import re
+from typing import Optional, TypedDict
+
+from frontend.services.files import atomic_write
+
+STORE_DIR = os.getenv("DOCUMENT_STORE_DIR", os.path.join(".cache", "documents"))
+# Document IDs are SHA-256 digests of the uploaded file.
+_DOCUMENT_ID = re.compile(r"[0-9a-f]{64}")
+
+
+def is_document_id(doc_id: str) -> bool:
+    return _DOCUMENT_ID.fullmatch(doc_id) is not None
+
+
+class DocumentMeta(TypedDict):
+    id: str
+    name: str
+    kind: str
+    chars: int
+
+
+class DocumentStore:
+    """Server-side store for extracted document text, keyed by document ID.
+
+    Reflex state only carries ``DocumentMeta``; handlers fetch the text from
+    here when they need it, so state deltas stay small however large the
+    uploads are.
+    """
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._pending: dict[str, tuple[asyncio.Task, DocumentMeta]] = {}
+
+    def _path(self, doc_id: str) -> str:
+        if not is_document_id(doc_id):
+            # IDs can come from API clients; never let one escape the store.
+            raise ValueError(f"Invalid document ID: {doc_id!r}")
+        return os.path.join(self.root, f"{doc_id}.txt")
+
+    def put(self, doc_id: str, text: str) -> None:
+        path = self._path(doc_id)
+        if os.path.exists(path):
+            # IDs are content hashes, so an existing file already holds this text.
+            return
+        atomic_write(path, text)
+
+    def get_text(self, doc_id: str) -> Optional[str]:
+        try:
+            with open(self._path(doc_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def track(self, meta: DocumentMeta, task: asyncio.Task) -> None:
+        """Register a background task that will ``put`` the text for ``meta["id"]``."""
+        doc_id = meta["id"]
+        self._pending[doc_id] = (task, meta)
+
+        def forget(_) -> None:
+            entry = self._pending.get(doc_id)
+            if entry is not None and entry[0] is task:
+                del self._pending[doc_id]
+
+        task.add_done_callback(forget)
+
+    def pending(self, doc_id: str) -> Optional[DocumentMeta]:
+        """Metadata of ``doc_id`` if it is still being extracted in the background.
+
+        Uploads of the same file share that extraction instead of starting their own.
+        """
+        entry = self._pending.get(doc_id)
+        return entry[1] if entry is not None else None
+
+    async def wait_ready(self, doc_ids: list[str]) -> None:
+        """Wait for any of ``doc_ids`` that are still being extracted in the background."""
+        pending = [self._pending[doc_id][0] for doc_id in doc_ids if doc_id in self._pending]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_texts(self, doc_ids: list[str]) -> list[str]:
+        texts = (self.get_text(doc_id) for doc_id in doc_ids)
+        return [text for text in texts if text]
+
+
+document_store = DocumentStore()
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from typing import Optional, TypedDict
+
+from frontend.services.document_store import document_store
+from frontend.services.files import atomic_write
+from frontend.services.llm import client
+from frontend.services.prompting import build_exam_prompt, system_prompt
+from frontend.services.question_bank import assemble_exam, bank_exam
+from frontend.services.response_cache import cache_key, response_cache
+
+MODEL_NAME = "mistral-large-latest"
+# Cache-key version of variant_prompt below.
+BATCH_PROMPT_VERSION = "exam-batch-v1"
+JOBS_DIR = os.getenv("EXAM_JOBS_DIR", os.path.join(".cache", "exam_jobs"))
+JOB_CONCURRENCY = int(os.getenv("EXAM_JOB_CONCURRENCY", "4"))
+MAX_EXAMS_PER_JOB = int(os.getenv("EXAM_JOB_MAX_EXAMS", "20"))
+# A running job that has not saved progress for this long lost its worker.
+STALE_SECONDS = 600
+
+variant_prompt = """
+This is exam variant {number} of {count}. Write questions that differ from the other variants while covering the same material.
+"""
+
+
+class ExamJob(TypedDict):
+    id: str
+    status: str
+    mode: str
+    count: int
+    completed: int
+    slide_ids: list[str]
+    exam_ids: list[str]
+    exams: list[Optional[str]]
+    errors: list[str]
+    created: float
+    updated: float
+
+
+# Shared by every job in this worker, so one large batch cannot starve the others.
+_slots = asyncio.Semaphore(JOB_CONCURRENCY)
+_tasks: dict[str, asyncio.Task] = {}
+
+
+def _path(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, f"{job_id}.json")
+
+
+def _save(job: ExamJob) -> None:
+    job["updated"] = time.time()
+    atomic_write(_path(job["id"]), json.dumps(job))
+
+
+def load_job(job_id: str) -> Optional[ExamJob]:
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id):
+        return None
+    try:
+        with open(_path(job_id), "r", encoding="utf-8") as f:
+            job = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if job["status"] in ("queued", "running") and job_id not in _tasks:
+        # Jobs only run in the worker that accepted them; if that worker is
+        # gone, report it rather than leaving the client polling forever.
+        if time.time() - job["updated"] > STALE_SECONDS:
+            job["status"] = "interrupted"
+    return job
+
+
+async def _generate(job: ExamJob, index: int, messages: list) -> None:
+    if job["mode"] == "bank":
+        async with _slots:
+            try:
+                job["exams"][index] = await assemble_exam(client, job["slide_ids"], job["exam_ids"])
+            except Exception as e:
+                logging.exception(f"Exam {index + 1} of job {job['id']} failed")
+                job["errors"].append(f"Exam {index + 1}: {e}")
+        job["completed"] += 1
+        _save(job)
+        return
+
+    variant_messages = messages[:-1] + [
+        {
+            "role": "user",
+            # The variant note goes last so every call shares the same prompt prefix.
+            "content": messages[-1]["content"] + variant_prompt.format(number=index + 1, count=job["count"]),
+        }
+    ]
+
+    async def ask() -> str:
+        completion = await client.chat.complete_async(model=MODEL_NAME, messages=variant_messages, temperature=0.3)
+        return completion.choices[0].message.content
+
+    # Keyed per job: a second job for the same documents must get new exams.
+    key = cache_key(job["slide_ids"] + job["exam_ids"], BATCH_PROMPT_VERSION, MODEL_NAME, 0.3, f"{job['id']}-variant-{index}")
+    async with _slots:
+        try:
+            job["exams"][index] = await response_cache.complete(key, ask)
+            await bank_exam(job["slide_ids"], job["exams"][index])
+        except Exception as e:
+            logging.exception(f"Exam {index + 1} of job {job['id']} failed")
+            job["errors"].append(f"Exam {index + 1}: {e}")
+    job["completed"] += 1
+    _save(job)
+
+
+async def _run(job: ExamJob) -> None:
+    try:
+        job["status"] = "running"
+        _save(job)
+        messages = []
+        if job["mode"] == "generate":
+            # The prompt is built once and shared by every exam in the batch.
+            user_prompt = await build_exam_prompt(
+                client, document_store.get_texts(job["slide_ids"]), document_store.get_texts(job["exam_ids"])
+            )
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ]
+        await asyncio.gather(*(_generate(job, index, messages) for index in range(job["count"])))
+        job["status"] = "failed" if all(exam is None for exam in job["exams"]) else "done"
+    except Exception as e:
+        logging.exception(f"Exam job {job['id']} failed")
+        job["errors"].append(str(e))
+        job["status"] = "failed"
+    finally:
+        _save(job)
+        _tasks.pop(job["id"], None)
+
+
+def submit_job(slide_ids: list[str], exam_ids: list[str], count: int, mode: str = "generate") -> ExamJob:
+    """Persist a new job and start generating its ``count`` exams in the background.
+
+    ``mode="bank"`` assembles each exam from the course's question bank and
+    only generates questions for topics the bank does not cover yet.
+    """
+    job: ExamJob = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "mode": mode,
+        "count": count,
+        "completed": 0,
+        "slide_ids": slide_ids,
+        "exam_ids": exam_ids,
+        "exams": [None] * count,
+        "errors": [],
+        "created": time.time(),
+        "updated": time.time(),
+    }
+    _save(job)
+    _tasks[job["id"]] = asyncio.create_task(_run(job))
+    return job
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from frontend.services.files import atomic_path, evict_directory
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(".cache", "exports"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+EXPORT_TIMEOUT = float(os.getenv("EXPORT_TIMEOUT", "60"))
+# Generated exams are a few tens of KB; anything far larger would only tie up a worker.
+EXPORT_MAX_CHARS = int(os.getenv("EXPORT_MAX_CHARS", str(500_000)))
+EXPORT_MAX_BYTES = int(os.getenv("EXPORT_MAX_BYTES", str(256 * 1024 * 1024)))
+EXPORT_MAX_AGE_SECONDS = int(os.getenv("EXPORT_MAX_AGE", str(7 * 24 * 3600)))
+
+EXAM_CSS = """
+body { font-family: sans-serif; font-size: 11pt; line-height: 1.4; }
+h1 { font-size: 18pt; } h2 { font-size: 15pt; } h3 { font-size: 13pt; }
+pre, code { font-family: monospace; font-size: 9.5pt; }
+table { border-collapse: collapse; } td, th { border: 1px solid #999; padding: 3px; }
+"""
+
+
+def _render(markdown: str, path: str) -> None:
+    """Lay the exam out on A4 pages with PyMuPDF's Story API (runs in a worker process)."""
+    import markdown2
+    import pymupdf
+
+    html = markdown2.markdown(markdown, extras=["tables", "fenced-code-blocks", "break-on-newline"])
+    story = pymupdf.Story(html=html, user_css=EXAM_CSS)
+    mediabox = pymupdf.paper_rect("a4")
+    where = mediabox + (54, 54, -54, -54)
+    writer = pymupdf.DocumentWriter(path)
+    more = True
+    while more:
+        device = writer.begin_page(mediabox)
+        more, _ = story.place(where)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_renders: dict[str, asyncio.Future] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=EXPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def _reset_pool(pool: ProcessPoolExecutor) -> None:
+    """Kill ``pool`` so a render that timed out stops holding a worker and writing files."""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+async def _render_in_pool(markdown: str, path: str) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        pool = _get_pool()
+        try:
+            await asyncio.wait_for(loop.run_in_executor(pool, _render, markdown, path), EXPORT_TIMEOUT)
+            return
+        except asyncio.TimeoutError:
+            _reset_pool(pool)
+            raise
+        except BrokenProcessPool:
+            if pool is not _pool:
+                # Another render's timeout killed this pool; render again on the new one.
+                continue
+            _reset_pool(pool)
+            raise
+
+
+def export_path(digest: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{digest}.pdf")
+
+
+async def export_exam_pdf(markdown: str) -> str:
+    """Render ``markdown`` to PDF and return its path, cached by content hash.
+
+    Repeat exports of the same exam are served from disk, and concurrent
+    exports of the same exam share one render.
+    """
+    digest = hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+    path = export_path(digest)
+    try:
+        # Count the hit for eviction without resetting the file's age.
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+        return path
+    except FileNotFoundError:
+        pass
+    render = _renders.get(digest)
+    if render is None:
+
+        async def run() -> None:
+            try:
+                with atomic_path(path) as tmp_path:
+                    await _render_in_pool(markdown, tmp_path)
+                evict_directory(EXPORT_DIR, EXPORT_MAX_BYTES, EXPORT_MAX_AGE_SECONDS, pattern=r"[0-9a-f]{64}\.pdf")
+            finally:
+                _renders.pop(digest, None)
+
+        render = _renders[digest] = asyncio.ensure_future(run())
+    await asyncio.shield(render)
+    return path
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Union
+
+MAX_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGES_PER_TASK = int(os.getenv("EXTRACTION_PAGES_PER_TASK", "25"))
+# Pages in the first range, kept small so the opening pages arrive quickly.
+FIRST_BATCH_PAGES = int(os.getenv("EXTRACTION_FIRST_BATCH_PAGES", "5"))
+MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "500"))
+TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT", "60"))
+# Ranges of one document queued ahead of the consumer after the first.
+PREFETCH_RANGES = int(os.getenv("EXTRACTION_PREFETCH_RANGES", str(MAX_WORKERS)))
+
+Source = Union[bytes, str]
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def _open(source: Source, engine: str):
+    if engine == "pdfplumber":
+        import io
+        import pdfplumber
+        return pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+    import pymupdf as fitz
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _page_count(source: Source, engine: str) -> int:
+    with _open(source, engine) as doc:
+        return len(doc.pages) if engine == "pdfplumber" else doc.page_count
+
+
+def _extract_range(source: Source, engine: str, start: int, stop: int) -> list[str]:
+    with _open(source, engine) as doc:
+        if engine == "pdfplumber":
+            return [doc.pages[i].extract_text() or "" for i in range(start, stop)]
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+# Jobs in flight on each pool, so a retired pool can let them finish first.
+_jobs: dict[ProcessPoolExecutor, set[Future]] = {}
+_reapers: dict[ProcessPoolExecutor, asyncio.Task] = {}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn rather than fork: the server process holds threads and sockets
+        # that must not be duplicated into the workers.
+        _pool = ProcessPoolExecutor(
+            max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def _submit(fn, *args) -> tuple[ProcessPoolExecutor, Future, asyncio.Future]:
+    pool = _get_pool()
+    job = pool.submit(fn, *args)
+    jobs = _jobs.setdefault(pool, set())
+    jobs.add(job)
+    job.add_done_callback(jobs.discard)
+    return pool, job, asyncio.wrap_future(job)
+
+
+def _kill(pool: ProcessPoolExecutor) -> None:
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+async def _reap(pool: ProcessPoolExecutor, grace: float) -> None:
+    running = [job for job in _jobs.pop(pool, set()) if not job.done()]
+    if running:
+        await asyncio.wait([asyncio.wrap_future(job) for job in running], timeout=grace)
+    _kill(pool)
+
+
+def _retire_pool(pool: ProcessPoolExecutor, abandoned: list[Future], grace: float) -> None:
+    """Stop giving ``pool`` new work, then kill it once its other jobs are done.
+
+    Only the pool the failure happened on is retired, so a failure noticed
+    late cannot tear down the fresh pool another request is already using.
+    Other requests' queued jobs are cancelled so their owners rerun them on
+    the new pool; running ones get ``grace`` seconds to finish before the
+    wedged worker is killed along with the pool.
+    """
+    global _pool
+    if _pool is pool:
+        _pool = None
+    jobs = _jobs.get(pool, set())
+    jobs.difference_update(abandoned)
+    for job in list(jobs):
+        job.cancel()
+    if pool not in _reapers:
+        reaper = _reapers[pool] = asyncio.create_task(_reap(pool, grace))
+        reaper.add_done_callback(lambda _: _reapers.pop(pool, None))
+
+
+async def iter_pages(
+    source: Source,
+    engine: str = "pymupdf",
+    max_pages: int = MAX_PAGES,
+    timeout: float = TIMEOUT_SECONDS,
+) -> AsyncIterator[list[str]]:
+    """Yield batches of per-page text in page order as soon as each is ready.
+
+    The small first range is submitted on its own so callers can act on the
+    opening pages almost immediately; later ranges are only queued a few at a
+    time as the caller asks for more, so another upload's opening pages never
+    wait behind this whole document.
+    ``source`` is either the raw PDF bytes or a path on disk. Documents longer
+    than ``max_pages`` are truncated, and the whole extraction is abandoned
+    after ``timeout`` seconds.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    calls: list[tuple] = [(_page_count, (source, engine))]
+    entries: list[tuple[ProcessPoolExecutor, Future, asyncio.Future]] = []
+    current = None
+
+    async def result(index: int):
+        nonlocal current
+        while True:
+            current = entries[index]
+            pool, job, future = current
+            try:
+                return await asyncio.wait_for(future, max(0.0, deadline - loop.time()))
+            except (asyncio.CancelledError, BrokenProcessPool):
+                if pool is _pool or asyncio.current_task().cancelling():
+                    raise
+                # Another request retired this pool under us; rerun the job on the new one.
+                fn, args = calls[index]
+                entries[index] = _submit(fn, *args)
+
+    try:
+        entries.append(_submit(_page_count, source, engine))
+        count = min(await result(0), max_pages)
+        starts = [0] + list(range(min(FIRST_BATCH_PAGES, count), count, PAGES_PER_TASK)) if count else []
+        calls += [(_extract_range, (source, engine, start, stop)) for start, stop in zip(starts, starts[1:] + [count])]
+        for index in range(1, len(calls)):
+            window = index + 1 if index == 1 else index + PREFETCH_RANGES
+            while len(entries) < min(len(calls), window):
+                fn, args = calls[len(entries)]
+                entries.append(_submit(fn, *args))
+            yield await result(index)
+    except asyncio.TimeoutError:
+        logging.warning(f"PDF extraction timed out after {timeout}s, retiring its extraction pool")
+        _retire_pool(current[0], [job for _, job, _ in entries], grace=timeout)
+        raise ExtractionError(f"Extraction timed out after {timeout}s")
+    except BrokenProcessPool:
+        logging.warning("An extraction worker died, restarting extraction pool")
+        pool = current[0] if current else _pool
+        if pool is not None:
+            _retire_pool(pool, [job for _, job, _ in entries], grace=0.0)
+        raise ExtractionError("Extraction worker crashed")
+    finally:
+        for _, _, future in entries:
+            future.cancel()
+
+
+async def extract_pages(
+    source: Source,
+    engine: str = "pymupdf",
+    max_pages: int = MAX_PAGES,
+    timeout: float = TIMEOUT_SECONDS,
+) -> list[str]:
+    """Extract every page's text in the process pool, in page order."""
+    async with aclosing(iter_pages(source, engine, max_pages, timeout)) as batches:
+        return [page async for batch in batches for page in batch]
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import time
+from typing import Optional, TypedDict
+
+from frontend.services.files import atomic_write, evict_directory
+
+CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", os.path.join(".cache", "extraction"))
+MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+MAX_AGE_SECONDS = int(os.getenv("EXTRACTION_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+
+class CachedExtraction(TypedDict):
+    pages: list[str]
+    classification: Optional[str]
+
+
+class ExtractionCache:
+    """On-disk cache of extracted page text and classification, keyed by content hash.
+
+    Entries are evicted least-recently-used first once the directory grows past
+    ``max_bytes``, and unconditionally once older than ``max_age``.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = MAX_BYTES, max_age: int = MAX_AGE_SECONDS):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, f"{digest}.json")
+
+    def get(self, digest: str) -> Optional[CachedExtraction]:
+        path = self._path(digest)
+        try:
+            stat = os.stat(path)
+            if time.time() - stat.st_mtime > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # mtime records when the entry was written, atime when it was last
+            # read; bumping atime keeps eviction LRU without resetting the age.
+            os.utime(path, (time.time(), stat.st_mtime))
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable extraction cache entry {digest}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def put(self, digest: str, pages: list[str], classification: Optional[str] = None) -> None:
+        entry: CachedExtraction = {"pages": pages, "classification": classification}
+        path = self._path(digest)
+        try:
+            atomic_write(path, json.dumps(entry))
+        except Exception as e:
+            logging.warning(f"Could not write extraction cache entry {digest}: {e}")
+            return
+        self.evict()
+
+    def set_classification(self, digest: str, classification: str) -> None:
+        entry = self.get(digest)
+        if entry is not None:
+            self.put(digest, entry["pages"], classification)
+
+    def evict(self) -> None:
+        evict_directory(self.root, self.max_bytes, self.max_age, pattern=r".*\.json")
+
+
+extraction_cache = ExtractionCache()
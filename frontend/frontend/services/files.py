@@ -0,0 +1,78 @@
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """Yield a temporary path to write ``path``'s contents to.
+
+    The temporary file replaces ``path`` only if the block succeeds, so
+    readers never see a partial file, and is removed otherwise. The parent
+    directory is created on first use.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def atomic_write(path: str, text: str) -> None:
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+
+def evict_directory(root: str, max_bytes: int, max_age: float, pattern: str = ".*") -> None:
+    """Bound a directory of cache files by age and total size.
+
+    Files whose mtime is older than ``max_age`` seconds are deleted, then the
+    least recently used ones (by atime) until the rest fit in ``max_bytes``.
+    Only files whose whole name matches ``pattern`` are considered.
+    """
+    matcher = re.compile(pattern)
+    now = time.time()
+    entries = []
+    total = 0
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if not matcher.fullmatch(name):
+            continue
+        path = os.path.join(root, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if not os.path.isfile(path):
+            continue
+        if now - stat.st_mtime > max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+        total += stat.st_size
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from functools import cached_property
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from frontend.services.tokens import count_tokens
+
+load_dotenv()
+
+LARGE_CONCURRENCY = int(os.getenv("MISTRAL_LARGE_CONCURRENCY", "8"))
+SMALL_CONCURRENCY = int(os.getenv("MISTRAL_SMALL_CONCURRENCY", "16"))
+REQUESTS_PER_SECOND = float(os.getenv("MISTRAL_RPS", "5"))
+TOKENS_PER_MINUTE = float(os.getenv("MISTRAL_TPM", "500000"))
+# Completion tokens are unknown up front; reserve this many per call.
+EXPECTED_COMPLETION_TOKENS = 1000
+MAX_RETRIES = int(os.getenv("MISTRAL_MAX_RETRIES", "3"))
+DEADLINE_SECONDS = float(os.getenv("MISTRAL_DEADLINE", "120"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+SERVER_URL = os.getenv("MISTRAL_SERVER_URL") or None
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate`` units per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        # A single request larger than the bucket would otherwise wait forever.
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class QueueStats:
+    """Running totals of how long calls waited for a concurrency slot."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waiting = 0
+
+    def record(self, wait: float) -> None:
+        self.calls += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "waiting": self.waiting,
+            "avg_wait_seconds": self.total_wait / self.calls if self.calls else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+
+_semaphores = {"large": asyncio.Semaphore(LARGE_CONCURRENCY), "small": asyncio.Semaphore(SMALL_CONCURRENCY)}
+_stats = {"large": QueueStats(), "small": QueueStats()}
+_requests = TokenBucket(REQUESTS_PER_SECOND, max(1.0, REQUESTS_PER_SECOND))
+_tokens = TokenBucket(TOKENS_PER_MINUTE / 60, TOKENS_PER_MINUTE)
+
+
+def _tier(model: str) -> str:
+    return "small" if "small" in model else "large"
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.TransportError):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def queue_stats() -> dict:
+    """Per-tier queue wait statistics, for sizing workers."""
+    return {tier: stats.snapshot() for tier, stats in _stats.items()}
+
+
+async def _acquire(model: str, messages: list) -> asyncio.Semaphore:
+    tier = _tier(model)
+    semaphore = _semaphores[tier]
+    stats = _stats[tier]
+    started = time.monotonic()
+    stats.waiting += 1
+    try:
+        await semaphore.acquire()
+    finally:
+        stats.waiting -= 1
+    try:
+        prompt_tokens = sum(count_tokens(str(message.get("content", ""))) for message in messages)
+        await _requests.acquire()
+        await _tokens.acquire(prompt_tokens + EXPECTED_COMPLETION_TOKENS)
+    except BaseException:
+        semaphore.release()
+        raise
+    stats.record(time.monotonic() - started)
+    return semaphore
+
+
+async def _with_retries(call, model: str):
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == MAX_RETRIES or not _is_retryable(e):
+                raise
+            # Full jitter keeps a burst of 429s from retrying in lockstep.
+            delay = random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+            logging.warning(f"Mistral call to {model} failed ({e}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+
+class _LimitedStream:
+    """Holds the concurrency slot until the wrapped event stream is closed."""
+
+    def __init__(self, stream, semaphore: asyncio.Semaphore):
+        self.stream = stream
+        self.semaphore = semaphore
+
+    async def __aenter__(self):
+        return await self.stream.__aenter__()
+
+    async def __aexit__(self, *exc_info):
+        try:
+            return await self.stream.__aexit__(*exc_info)
+        finally:
+            self.semaphore.release()
+
+
+class _Chat:
+    def __init__(self, client: "LimitedClient"):
+        self.client = client
+
+    async def complete_async(self, *, model: str, messages: list, deadline: float = DEADLINE_SECONDS, **kwargs):
+        semaphore = await _acquire(model, messages)
+        try:
+            async with asyncio.timeout(deadline):
+                return await _with_retries(
+                    lambda: self.client.mistral.chat.complete_async(model=model, messages=messages, **kwargs), model
+                )
+        finally:
+            semaphore.release()
+
+    async def stream_async(self, *, model: str, messages: list, deadline: float = DEADLINE_SECONDS, **kwargs):
+        """Open a stream; ``deadline`` bounds the time until the response starts."""
+        semaphore = await _acquire(model, messages)
+        try:
+            async with asyncio.timeout(deadline):
+                stream = await _with_retries(
+                    lambda: self.client.mistral.chat.stream_async(model=model, messages=messages, **kwargs), model
+                )
+        except BaseException:
+            semaphore.release()
+            raise
+        return _LimitedStream(stream, semaphore)
+
+
+class LimitedClient:
+    """Drop-in for ``Mistral`` exposing ``chat.complete_async`` and
+    ``chat.stream_async`` behind shared concurrency and rate limits.
+
+    The HTTP and Mistral clients are built on first use, so importing the app
+    does not pay for the ``mistralai`` import.
+    """
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+        self.configured = bool(api_key)
+        self.chat = _Chat(self)
+
+    @cached_property
+    def http(self) -> httpx.AsyncClient:
+        # One pooled HTTP client for every call keeps TLS connections warm.
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=LARGE_CONCURRENCY + SMALL_CONCURRENCY, max_keepalive_connections=LARGE_CONCURRENCY + SMALL_CONCURRENCY),
+            timeout=httpx.Timeout(DEADLINE_SECONDS, connect=10.0),
+        )
+
+    @cached_property
+    def mistral(self):
+        from mistralai import Mistral
+
+        # MISTRAL_SERVER_URL points the app at bench/fake_mistral.py for offline runs.
+        return Mistral(api_key=self.api_key or "", server_url=SERVER_URL, async_client=self.http)
+
+
+mistral_api_key = os.getenv("MISTRAL_API_KEY")
+if not mistral_api_key:
+    logging.warning(
+        "MISTRAL_API_KEY environment variable not set. Exam generation will not work."
+    )
+client = LimitedClient(mistral_api_key)
@@ -0,0 +1,6 @@
+from typing import TypedDict
+
+
+class ChatMessage(TypedDict):
+    role: str
+    content: str
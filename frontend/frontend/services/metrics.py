@@ -0,0 +1,95 @@
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+STAGE_SECONDS = Histogram(
+    "exam_app_stage_seconds",
+    "Time spent in each stage of a request.",
+    ["handler", "stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+TOKENS = Histogram(
+    "exam_app_tokens",
+    "Approximate prompt and response tokens per LLM call.",
+    ["handler", "kind"],
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000),
+)
+PREPROCESS_TOKENS = Counter(
+    "exam_app_preprocess_tokens",
+    "Approximate document tokens before and after normalisation.",
+    ["stage"],
+)
+
+trace_logger = logging.getLogger("frontend.trace")
+
+
+class Trace:
+    """Per-request timing spans, exported as histograms and one log line.
+
+    Usage::
+
+        trace = Trace("process_question")
+        with trace.span("retrieval"):
+            ...
+        trace.tokens(prompt=1200, response=300)
+        trace.log()
+    """
+
+    def __init__(self, handler: str, **fields):
+        self.handler = handler
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.spans: dict[str, float] = {}
+        self.fields = fields
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def record(self, stage: str, seconds: float) -> None:
+        STAGE_SECONDS.labels(self.handler, stage).observe(seconds)
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def tokens(self, prompt: int | None = None, response: int | None = None) -> None:
+        if prompt is not None:
+            TOKENS.labels(self.handler, "prompt").observe(prompt)
+            self.fields["prompt_tokens"] = prompt
+        if response is not None:
+            TOKENS.labels(self.handler, "response").observe(response)
+            self.fields["response_tokens"] = response
+
+    def normalized(self, before: int, after: int) -> None:
+        """Record the token savings of normalising one document."""
+        PREPROCESS_TOKENS.labels("before").inc(before)
+        PREPROCESS_TOKENS.labels("after").inc(after)
+        self.fields["tokens_before"] = self.fields.get("tokens_before", 0) + before
+        self.fields["tokens_after"] = self.fields.get("tokens_after", 0) + after
+
+    def log(self, **fields) -> None:
+        total = time.perf_counter() - self.started
+        STAGE_SECONDS.labels(self.handler, "total").observe(total)
+        trace_logger.info(
+            json.dumps(
+                {
+                    "trace_id": self.id,
+                    "handler": self.handler,
+                    "total_seconds": round(total, 4),
+                    "spans": {stage: round(seconds, 4) for stage, seconds in self.spans.items()},
+                    **self.fields,
+                    **fields,
+                }
+            )
+        )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus exposition body and its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,110 @@
+import re
+from collections import Counter
+from typing import NamedTuple, Optional
+
+from frontend.services.tokens import count_tokens
+
+# A line on at least this share of pages (and at least MIN_PAGES of them) is boilerplate.
+BOILERPLATE_SHARE = 0.5
+MIN_PAGES = 3
+# Lines this close to the top or bottom of a page count as header/footer.
+EDGE_LINES = 2
+
+_SPACES = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_DIGITS = re.compile(r"\d+")
+_PAGE_NUMBER = re.compile(r"^(?:page|slide|p\.)?\s*\d+\s*(?:(?:/|of)\s*\d+)?$", re.IGNORECASE)
+# Answer options ("d) None of the above") and question lines legitimately
+# repeat on every page of an exam and must never be taken for boilerplate.
+_QUESTION_LINE = re.compile(r"^(?:\(?[a-h][.)]\s|\d{1,3}[.)]\s|(?:q|question|problem)\s*\d+)|\?$", re.IGNORECASE)
+
+
+class Normalized(NamedTuple):
+    pages: list[str]
+    tokens_before: int
+    tokens_after: int
+
+
+def _clean_lines(page: str) -> list[str]:
+    lines = (_SPACES.sub(" ", line).strip() for line in page.splitlines())
+    return [line for line in lines if line]
+
+
+def _edges(lines: list[str]) -> list[str]:
+    return lines[:EDGE_LINES] + lines[-EDGE_LINES:] if len(lines) > 2 * EDGE_LINES else lines
+
+
+def _build_key(lines: list[str], kind: Optional[str]) -> set[str]:
+    """Lines that identify a page when looking for incremental builds.
+
+    Page numbers are left out, and on slides the digits of header and footer
+    lines are masked, so "Lecture 3 - 12/40" does not hide a build.
+    """
+    edges = set(_edges(lines))
+    key: set[str] = set()
+    for line in lines:
+        if line in edges:
+            if _PAGE_NUMBER.match(line):
+                continue
+            if kind == "slide":
+                line = _DIGITS.sub("#", line)
+        key.add(line)
+    return key
+
+
+def normalize_pages(pages: list[str], kind: Optional[str] = None) -> Normalized:
+    """Strip what costs tokens without carrying content.
+
+    Collapses whitespace, drops pages whose lines all reappear on the next
+    page, as incremental-build slides and duplicates do, then drops page
+    numbers and header/footer lines repeated on most of the remaining pages
+    (course banners, copyright lines). Builds are collapsed first so that the
+    title and opening bullets of a build are not counted once per step.
+
+    Answer options and question lines are never treated as boilerplate, nor is
+    any repeated line of an exam (``kind="test"``). Headers and footers that
+    differ only in their numbers ("Lecture 3 - 12/40") are only treated as
+    boilerplate for slides, where numbered exam questions cannot be mistaken
+    for them.
+    """
+    tokens_before = count_tokens("\n".join(pages))
+
+    collapsed: list[list[str]] = []
+    keys: list[set[str]] = []
+    for lines in (_clean_lines(page) for page in pages):
+        if not lines:
+            continue
+        key = _build_key(lines, kind)
+        # An incremental build repeats the previous slide and adds to it; keep only the fullest one.
+        if keys and keys[-1] <= key:
+            collapsed[-1], keys[-1] = lines, key
+        else:
+            collapsed.append(lines)
+            keys.append(key)
+
+    boilerplate: set[str] = set()
+    if len(collapsed) >= MIN_PAGES:
+        threshold = max(MIN_PAGES, BOILERPLATE_SHARE * len(collapsed))
+        if kind != "test":
+            counts = Counter(line for lines in collapsed for line in set(_edges(lines)))
+            boilerplate = {line for line, count in counts.items() if count >= threshold}
+        if kind == "slide":
+            masked_counts = Counter(
+                masked_line for lines in collapsed for masked_line in {_DIGITS.sub("#", line) for line in _edges(lines)}
+            )
+            boilerplate |= {line for line, count in masked_counts.items() if count >= threshold and "#" in line}
+
+    kept: list[list[str]] = []
+    for lines in collapsed:
+        edges = set(_edges(lines))
+        lines = [
+            line
+            for line in lines
+            if line not in edges
+            or _QUESTION_LINE.search(line)
+            or not (line in boilerplate or _DIGITS.sub("#", line) in boilerplate or _PAGE_NUMBER.match(line))
+        ]
+        if lines:
+            kept.append(lines)
+
+    normalized = ["\n".join(lines) for lines in kept]
+    return Normalized(normalized, tokens_before, count_tokens("\n".join(normalized)))
@@ -0,0 +1,114 @@
+import asyncio
+import hashlib
+import logging
+import os
+
+from frontend.services.files import atomic_write
+from frontend.services.retrieval import chunk_text
+from frontend.services.tokens import CHARS_PER_TOKEN, count_tokens
+
+EXAM_TOKEN_BUDGET = int(os.getenv("EXAM_PROMPT_TOKEN_BUDGET", "24000"))
+# Share of the budget kept for past exams; they only need to convey style.
+EXAMS_BUDGET_SHARE = 0.25
+MAP_CHUNK_TOKENS = int(os.getenv("EXAM_MAP_CHUNK_TOKENS", "6000"))
+MAP_CONCURRENCY = int(os.getenv("EXAM_MAP_CONCURRENCY", "4"))
+MAP_MAX_ROUNDS = 2
+SUMMARY_MODEL = "mistral-small-latest"
+SUMMARY_CACHE_DIR = os.getenv("SUMMARY_CACHE_DIR", os.path.join(".cache", "summaries"))
+
+# Cache-key version of system_prompt and exam_user_prompt below.
+EXAM_PROMPT_VERSION = "exam-v1"
+
+system_prompt = """
+You are an expert exam writer for a university course. Your task is to generate new exam questions based on provided course material and the style of previous exams.
+
+**Style Guidelines to Follow from Previous Exams:**
+*   **Tone:** {describe the tone, e.g., formal, precise, challenging}
+*   **Structure:** {describe the structure, e.g., "Section A: Multiple Choice, Section B: Short Answer, Section C: Essay"}
+*   **Question Phrasing:** {describe how questions are phrased, e.g., "Questions often start with 'Compare and contrast...', 'Explain the significance of...'"}
+*   **Difficulty Level:** {describe the difficulty, e.g., "Focus on application, not just memorization."}
+*   **Specific Instructions:** {include any specific instructions from the old exams, e.g., "Show all your work for full credit."}
+
+**Your Process:**
+1.  Analyze the provided course slides to understand the key topics and concepts.
+2.  Analyze the previous exams to understand the exact style, structure, and difficulty you must replicate.
+3.  Generate a new exam that comprehensively tests the material from the slides in the exact style of the previous exams.
+4.  **Most Importantly: DO NOT invent topics not covered in the provided slides.**
+"""
+
+summary_prompt = """
+You are preparing study material for an exam writer. Summarise the lecture content below into a dense list of the topics, definitions, key facts, formulas and examples it covers. Keep technical terms exactly as written. Do not add anything that is not in the content.
+
+**LECTURE CONTENT:**
+{text}
+"""
+
+exam_user_prompt = """
+**COURSE SLIDES CONTENT:**
+{slides_text}
+
+**PREVIOUS EXAMS FOR STYLE REFERENCE:**
+{exams_text}
+
+**TASK:**
+Based on the course slides above, and meticulously mimicking the style, structure, and difficulty of the previous exams provided, generate a complete new exam. The exam should cover the major topics from the slides.
+"""
+
+
+def _join_documents(texts: list[str], label: str) -> str:
+    return "\n\n".join(f"--- {label} {i + 1} ---\n{text.strip()}" for i, text in enumerate(texts))
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars] + "\n[...]"
+
+
+async def _summarise(client, text: str, semaphore: asyncio.Semaphore) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    path = os.path.join(SUMMARY_CACHE_DIR, f"{digest}.txt")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    async with semaphore:
+        response = await client.chat.complete_async(
+            model=SUMMARY_MODEL,
+            messages=[{"role": "user", "content": summary_prompt.format(text=text)}],
+            temperature=0.0,
+        )
+    summary = response.choices[0].message.content.strip()
+    atomic_write(path, summary)
+    return summary
+
+
+async def _map_slides(client, slides: list[str], budget: int) -> list[str]:
+    """Summarise slide chunks in parallel until they fit in ``budget`` tokens."""
+    semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+    texts = slides
+    for _ in range(MAP_MAX_ROUNDS):
+        if count_tokens("\n\n".join(texts)) <= budget:
+            break
+        chunks = [chunk for text in texts for chunk in chunk_text(text, MAP_CHUNK_TOKENS * CHARS_PER_TOKEN, 0)]
+        texts = await asyncio.gather(*(_summarise(client, chunk, semaphore) for chunk in chunks))
+        logging.info(f"Summarised {len(chunks)} slide chunks to {count_tokens(''.join(texts))} tokens")
+    return texts
+
+
+async def build_exam_prompt(client, slides: list[str], exams: list[str], budget: int = EXAM_TOKEN_BUDGET) -> str:
+    """Build the user prompt for exam generation within ``budget`` tokens.
+
+    Slides that do not fit are map-reduced into topic summaries with the
+    small model; summaries are cached by chunk hash so later generations
+    from the same material skip the map step.
+    """
+    exams_text = _join_documents(exams, "Exam")
+    exams_budget = int(budget * EXAMS_BUDGET_SHARE)
+    if count_tokens(exams_text) > exams_budget:
+        exams_text = _truncate(exams_text, exams_budget)
+    slides_budget = budget - count_tokens(exams_text)
+
+    slides_text = _join_documents(slides, "Slides")
+    if count_tokens(slides_text) > slides_budget:
+        summaries = await _map_slides(client, slides, slides_budget)
+        slides_text = _truncate(_join_documents(summaries, "Topic summary"), slides_budget)
+    return exam_user_prompt.format(slides_text=slides_text, exams_text=exams_text)
@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import time
+from array import array
+from typing import Optional
+
+from frontend.services.document_store import document_store
+from frontend.services.retrieval import get_index, tokenize
+from frontend.services.tokens import CHARS_PER_TOKEN
+
+BANK_PATH = os.getenv("QUESTION_BANK_PATH", os.path.join(".cache", "question_bank.db"))
+# Estimated Jaccard similarity above which two questions count as the same.
+DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_BANK_DUPLICATE_THRESHOLD", "0.7"))
+DEFAULT_QUESTIONS_PER_EXAM = 10
+STYLE_EXAMPLE_TOKENS = 2000
+BANK_MODEL = "mistral-large-latest"
+
+# MinHash with 16 bands of 4 rows: pairs above ~0.5 Jaccard almost always
+# share a band, pairs below ~0.2 almost never do.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_QUESTION_START = re.compile(
+    r"^\s*(?:#+\s*)?(?:\*\*)?\s*(?:question|q)\s*(\d+)\s*[.:)]?\s*(?:\*\*)?\s*[.:)]?\s*|^\s*(?:\*\*)?(\d{1,2})[.)](?:\*\*)?\s+",
+    re.IGNORECASE,
+)
+_SECTION = re.compile(r"^\s*#+\s+(?!.*question)", re.IGNORECASE)
+
+bank_fill_prompt = """
+You are an expert exam writer for a university course. Write exactly {count} new exam questions, one for each of the course excerpts below. Match the style, format and difficulty of the example questions from previous exams. Do not invent topics that are not in the excerpts.
+
+**EXAMPLE QUESTIONS FROM PREVIOUS EXAMS:**
+{examples}
+
+**COURSE EXCERPTS:**
+{excerpts}
+
+Write each question as "**Question N.**" followed by the question, including any answer options. Do not write answers or any other text.
+"""
+
+
+def parse_questions(markdown: str) -> list[str]:
+    """Split a generated exam into its questions, without their numbering."""
+    questions: list[str] = []
+    current: Optional[list[str]] = None
+    number = 0
+    # Inside a "Question N" block, a bare "1." starts a numbered list of
+    # sub-parts; only "N+1." before any such list starts the next question.
+    labelled = False
+    in_list = False
+    for line in markdown.splitlines():
+        match = _QUESTION_START.match(line)
+        if match and match.group(1) is None and labelled:
+            if in_list or int(match.group(2)) != number + 1:
+                in_list = True
+                match = None
+        if match:
+            if current:
+                questions.append("\n".join(current).strip())
+            current = [line[match.end():]]
+            number = int(match.group(1) or match.group(2))
+            labelled = match.group(1) is not None
+            in_list = False
+        elif _SECTION.match(line) and current is not None:
+            questions.append("\n".join(current).strip())
+            current = None
+            labelled = False
+        elif current is not None:
+            current.append(line)
+    if current:
+        questions.append("\n".join(current).strip())
+    return [question for question in questions if len(tokenize(question)) >= 3]
+
+
+def course_id(slide_ids: list[str]) -> str:
+    """Sessions that uploaded the same slides share a question bank."""
+    return hashlib.sha256("\n".join(sorted(set(slide_ids))).encode("utf-8")).hexdigest()[:16]
+
+
+def signature(text: str) -> array:
+    words = tokenize(text)
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return array("Q", (min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS))
+
+
+def _bands(sig: array) -> list[str]:
+    return [hashlib.blake2b(sig[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).hexdigest() for i in range(BANDS)]
+
+
+def _similarity(a: array, b: array) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+class QuestionBank:
+    """Persistent per-course store of generated questions with MinHash/LSH
+    near-duplicate detection. Calls are synchronous; run them off the loop."""
+
+    def __init__(self, path: str = BANK_PATH):
+        self.path = path
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._ready:
+            # Created on first use rather than at import, to keep startup cheap.
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with sqlite3.connect(self.path, timeout=30) as db:
+                db.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS questions (
+                        id INTEGER PRIMARY KEY, course TEXT, topic TEXT, text TEXT, signature BLOB, created REAL
+                    );
+                    CREATE INDEX IF NOT EXISTS questions_course ON questions (course, topic);
+                    CREATE TABLE IF NOT EXISTS buckets (course TEXT, band INTEGER, bucket TEXT, question_id INTEGER);
+                    CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (course, band, bucket);
+                    """
+                )
+            self._ready = True
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def find_duplicate(self, db: sqlite3.Connection, course: str, sig: array) -> Optional[int]:
+        candidates = set()
+        for band, bucket in enumerate(_bands(sig)):
+            rows = db.execute(
+                "SELECT question_id FROM buckets WHERE course = ? AND band = ? AND bucket = ?", (course, band, bucket)
+            )
+            candidates.update(row[0] for row in rows)
+        for question_id in candidates:
+            (blob,) = db.execute("SELECT signature FROM questions WHERE id = ?", (question_id,)).fetchone()
+            if _similarity(sig, array("Q", blob)) >= DUPLICATE_THRESHOLD:
+                return question_id
+        return None
+
+    def add(self, course: str, questions: list[tuple[str, str]]) -> int:
+        """Store ``(topic, text)`` pairs, skipping near-duplicates. Returns how many were new."""
+        added = 0
+        with self._connect() as db:
+            for topic, text in questions:
+                sig = signature(text)
+                if self.find_duplicate(db, course, sig) is not None:
+                    continue
+                cursor = db.execute(
+                    "INSERT INTO questions (course, topic, text, signature, created) VALUES (?, ?, ?, ?, ?)",
+                    (course, topic, text, sig.tobytes(), time.time()),
+                )
+                db.executemany(
+                    "INSERT INTO buckets (course, band, bucket, question_id) VALUES (?, ?, ?, ?)",
+                    [(course, band, bucket, cursor.lastrowid) for band, bucket in enumerate(_bands(sig))],
+                )
+                added += 1
+        return added
+
+    def by_topic(self, course: str) -> dict[str, list[str]]:
+        with self._connect() as db:
+            rows = db.execute("SELECT topic, text FROM questions WHERE course = ?", (course,)).fetchall()
+        topics: dict[str, list[str]] = {}
+        for topic, text in rows:
+            topics.setdefault(topic, []).append(text)
+        return topics
+
+
+question_bank = QuestionBank()
+
+
+def _topic_of(question: str, slide_ids: list[str]) -> str:
+    """Tag a question with the slide chunk it is most about."""
+    best = (0.0, "general")
+    for doc_id in slide_ids:
+        index = get_index(doc_id)
+        if index is None:
+            continue
+        for score, chunk_id in index.search(question, top_k=1):
+            if score > best[0]:
+                best = (score, f"{doc_id}:{chunk_id}")
+    return best[1]
+
+
+async def bank_exam(slide_ids: list[str], markdown: str) -> int:
+    """Parse a generated exam and add its new questions to the course's bank."""
+    questions = parse_questions(markdown)
+    if not questions:
+        return 0
+    tagged = [(_topic_of(question, slide_ids), question) for question in questions]
+    added = await asyncio.to_thread(question_bank.add, course_id(slide_ids), tagged)
+    logging.info(f"Banked {added} of {len(questions)} generated questions")
+    return added
+
+
+async def assemble_exam(client, slide_ids: list[str], exam_ids: list[str], num_questions: Optional[int] = None) -> str:
+    """Build an exam mostly from banked questions, generating only uncovered topics.
+
+    Each slide chunk is a topic. Topics that already have banked questions
+    contribute a randomly chosen one; the LLM is asked only for the rest.
+    """
+    await document_store.wait_ready(slide_ids + exam_ids)
+    exams = document_store.get_texts(exam_ids)
+    if num_questions is None:
+        counts = [len(parse_questions(exam)) for exam in exams]
+        counts = [count for count in counts if count]
+        num_questions = sorted(counts)[len(counts) // 2] if counts else DEFAULT_QUESTIONS_PER_EXAM
+
+    topics = []
+    for doc_id in slide_ids:
+        index = get_index(doc_id)
+        if index is not None:
+            topics += [(f"{doc_id}:{chunk_id}", chunk) for chunk_id, chunk in enumerate(index.chunks)]
+    random.shuffle(topics)
+
+    banked = await asyncio.to_thread(question_bank.by_topic, course_id(slide_ids))
+    picked = [random.choice(banked[topic]) for topic, _ in topics if topic in banked][:num_questions]
+    missing = [(topic, chunk) for topic, chunk in topics if topic not in banked][: num_questions - len(picked)]
+
+    if missing:
+        examples = "\n\n".join(exams)[: STYLE_EXAMPLE_TOKENS * CHARS_PER_TOKEN]
+        excerpts = "\n\n".join(f"--- Excerpt {i + 1} ---\n{chunk}" for i, (_, chunk) in enumerate(missing))
+        completion = await client.chat.complete_async(
+            model=BANK_MODEL,
+            messages=[{"role": "user", "content": bank_fill_prompt.format(count=len(missing), examples=examples, excerpts=excerpts)}],
+            temperature=0.3,
+        )
+        fresh = parse_questions(completion.choices[0].message.content)
+        await asyncio.to_thread(
+            question_bank.add, course_id(slide_ids), [(topic, question) for (topic, _), question in zip(missing, fresh)]
+        )
+        picked += fresh
+        logging.info(f"Assembled exam from {len(picked) - len(fresh)} banked and {len(fresh)} new questions")
+
+    random.shuffle(picked)
+    return "# Exam\n\n" + "\n\n".join(f"**Question {i + 1}.** {question}" for i, question in enumerate(picked))
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, NamedTuple, Optional
+
+# Events kept per generation. Coalesced chunks are ~256 bytes, so this bounds
+# a buffer at roughly 1 MiB however long the exam is.
+MAX_EVENTS = int(os.getenv("REPLAY_MAX_EVENTS", "4096"))
+# A generation nobody has read from for this long is dropped, and cancelled if still running.
+IDLE_TTL = float(os.getenv("REPLAY_IDLE_TTL", "600"))
+HEARTBEAT_SECONDS = 15.0
+
+
+class ReplayGap(Exception):
+    """The events after the requested ID have already left the ring buffer."""
+
+
+class Event(NamedTuple):
+    id: int
+    event: str
+    data: str
+
+
+class _Generation:
+    def __init__(self, max_events: int):
+        self.id = uuid.uuid4().hex
+        self.events: deque[Event] = deque(maxlen=max_events)
+        self.next_id = 1
+        self.done = False
+        self.subscribers = 0
+        self.last_access = time.monotonic()
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+    async def append(self, event: str, data: str) -> None:
+        async with self.changed:
+            self.events.append(Event(self.next_id, event, data))
+            self.next_id += 1
+            self.changed.notify_all()
+
+
+class ReplayStore:
+    """Runs generations detached from the HTTP connection that started them.
+
+    Each generation writes numbered events into a bounded ring buffer, so a
+    client that drops can reconnect with the last event ID it saw and resume
+    without a second upstream call.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS, idle_ttl: float = IDLE_TTL):
+        self.max_events = max_events
+        self.idle_ttl = idle_ttl
+        self._generations: dict[str, _Generation] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def _run(self, generation: _Generation, produce: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async with aclosing(produce()) as chunks:
+                async for chunk in chunks:
+                    await generation.append("chunk", chunk)
+            await generation.append("done", "")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception(f"Detached generation {generation.id} failed")
+            await generation.append("error", str(e))
+        finally:
+            async with generation.changed:
+                generation.done = True
+                generation.changed.notify_all()
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(self.idle_ttl / 4)
+            now = time.monotonic()
+            for generation in list(self._generations.values()):
+                if generation.subscribers == 0 and now - generation.last_access > self.idle_ttl:
+                    if not generation.done and generation.task is not None:
+                        logging.info(f"Cancelling generation {generation.id}: no client for {self.idle_ttl:.0f}s")
+                        generation.task.cancel()
+                    del self._generations[generation.id]
+
+    def start(self, produce: Callable[[], AsyncIterator[str]]) -> str:
+        """Start ``produce`` in the background and return its generation ID."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+        generation = _Generation(self.max_events)
+        # Event 1 tells the client which generation to resume.
+        generation.events.append(Event(1, "generation", generation.id))
+        generation.next_id = 2
+        generation.task = asyncio.create_task(self._run(generation, produce))
+        self._generations[generation.id] = generation
+        return generation.id
+
+    def exists(self, generation_id: str) -> bool:
+        return generation_id in self._generations
+
+    async def events(self, generation_id: str, last_event_id: int = 0) -> AsyncIterator[Optional[Event]]:
+        """Yield the events after ``last_event_id``, then follow the generation live.
+
+        ``None`` is yielded every ``HEARTBEAT_SECONDS`` without news, so the
+        caller can keep idle connections open. Raises ``KeyError`` for an
+        unknown or evicted generation and ``ReplayGap`` when the requested
+        events are no longer buffered.
+        """
+        generation = self._generations[generation_id]
+        generation.subscribers += 1
+        position = max(0, min(last_event_id, generation.next_id - 1))
+        try:
+            while True:
+                async with generation.changed:
+                    try:
+                        await asyncio.wait_for(
+                            generation.changed.wait_for(
+                                lambda: generation.done or generation.next_id - 1 > position
+                            ),
+                            HEARTBEAT_SECONDS,
+                        )
+                    except asyncio.TimeoutError:
+                        pending = None
+                    else:
+                        if generation.events and generation.events[0].id > position + 1:
+                            raise ReplayGap(f"Events after {position} are no longer available")
+                        pending = [event for event in generation.events if event.id > position]
+                    done = generation.done
+                generation.last_access = time.monotonic()
+                if pending is None:
+                    yield None
+                    continue
+                for event in pending:
+                    yield event
+                if pending:
+                    position = pending[-1].id
+                if done and position == generation.next_id - 1:
+                    return
+        finally:
+            generation.subscribers -= 1
+            generation.last_access = time.monotonic()
+
+
+def format_sse(event: Event) -> str:
+    data = "\n".join(f"data: {line}" for line in event.data.split("\n"))
+    return f"id: {event.id}\nevent: {event.event}\n{data}\n\n"
+
+
+replay_store = ReplayStore()
@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+MAX_CHARS = int(os.getenv("RESPONSE_CACHE_MAX_CHARS", str(64 * 1024 * 1024)))
+
+
+def cache_key(doc_ids: list[str], template: str, model: str, temperature: Optional[float], question: str = "") -> str:
+    """Key a response by everything that determines it.
+
+    ``doc_ids`` are taken in order, since document order changes the prompt.
+    ``template`` names the prompt and its version (e.g. ``"exam-v1"``); bump
+    the version whenever the prompt text changes so stale answers are not
+    served.
+    """
+    payload = json.dumps([doc_ids, template, model, temperature, question])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """An upstream call in progress, replayable by any number of subscribers."""
+
+    def __init__(self):
+        self.chunks: list[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ResponseCache:
+    """TTL- and size-bounded cache of LLM responses with in-flight coalescing.
+
+    Concurrent identical requests share a single upstream call: the first
+    caller starts it and every caller, including late joiners, replays its
+    stream from the beginning. The upstream call is cancelled once every
+    subscriber has gone away.
+    """
+
+    def __init__(self, ttl: float = TTL_SECONDS, max_chars: int = MAX_CHARS):
+        self.ttl = ttl
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._chars = 0
+        self._flights: dict[str, _Flight] = {}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, text)
+        self._chars += len(text)
+        while self._chars > self.max_chars and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        _, text = self._entries.pop(key)
+        self._chars -= len(text)
+
+    async def _run(self, key: str, flight: _Flight, produce: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async with aclosing(produce()) as chunks:
+                async for chunk in chunks:
+                    async with flight.changed:
+                        flight.chunks.append(chunk)
+                        flight.changed.notify_all()
+            self.put(key, "".join(flight.chunks))
+        except BaseException as e:
+            flight.error = e
+            if not isinstance(e, asyncio.CancelledError):
+                logging.warning(f"Upstream call for cached response failed: {e}")
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            async with flight.changed:
+                flight.done = True
+                flight.changed.notify_all()
+
+    async def stream(self, key: str, produce: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Yield the response for ``key``, calling ``produce`` only if nobody else is."""
+        cached = self.get(key)
+        if cached is not None:
+            yield cached
+            return
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight()
+            flight.task = asyncio.create_task(self._run(key, flight, produce))
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                async with flight.changed:
+                    await flight.changed.wait_for(lambda: flight.done or len(flight.chunks) > position)
+                    pending = flight.chunks[position:]
+                    done = flight.done
+                for chunk in pending:
+                    yield chunk
+                position += len(pending)
+                if done and position == len(flight.chunks):
+                    break
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done and flight.task is not None:
+                flight.task.cancel()
+                # Late joiners must start a fresh call rather than attach to
+                # one that is being torn down.
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    async def complete(self, key: str, produce: Callable[[], Awaitable[str]]) -> str:
+        """Non-streaming variant of ``stream`` for single-shot completions."""
+
+        async def as_stream() -> AsyncIterator[str]:
+            yield await produce()
+
+        return "".join([chunk async for chunk in self.stream(key, as_stream)])
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,133 @@
+import logging
+import math
+import os
+import re
+from array import array
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from frontend.services.document_store import document_store
+from frontend.services.tokens import count_tokens
+
+CHUNK_CHARS = int(os.getenv("RETRIEVAL_CHUNK_CHARS", "1500"))
+CHUNK_OVERLAP = int(os.getenv("RETRIEVAL_CHUNK_OVERLAP", "200"))
+TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "3000"))
+MAX_INDEXES = int(os.getenv("RETRIEVAL_MAX_INDEXES", "256"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return [word for word in _WORD.findall(text.lower()) if len(word) > 1]
+
+
+def chunk_text(text: str, chunk_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> list[str]:
+    """Split text into overlapping chunks, preferring paragraph and line breaks."""
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            cut = max(text.rfind("\n\n", start, end), text.rfind("\n", start, end))
+            if cut > start + chunk_chars // 2:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class DocumentIndex:
+    """BM25 index over the chunks of a single document.
+
+    Postings are stored as parallel ``array`` columns (chunk id, term
+    frequency) per term so a large document stays compact in memory.
+    """
+
+    def __init__(self, chunks: list[str]):
+        self.chunks = chunks
+        self.lengths = array("I")
+        self.postings: dict[str, tuple[array, array]] = {}
+        for chunk_id, chunk in enumerate(chunks):
+            terms = Counter(tokenize(chunk))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                ids, tfs = self.postings.setdefault(term, (array("I"), array("I")))
+                ids.append(chunk_id)
+                tfs.append(tf)
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, query: str, top_k: int = TOP_K) -> list[tuple[float, int]]:
+        n = len(self.chunks)
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs = posting
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            for chunk_id, tf in zip(ids, tfs):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[chunk_id] / self.avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(((score, chunk_id) for chunk_id, score in scores.items()), reverse=True)[:top_k]
+
+
+_indexes: "OrderedDict[str, DocumentIndex]" = OrderedDict()
+
+
+def index_document(doc_id: str, text: str) -> DocumentIndex:
+    index = DocumentIndex(chunk_text(text))
+    _indexes[doc_id] = index
+    _indexes.move_to_end(doc_id)
+    while len(_indexes) > MAX_INDEXES:
+        _indexes.popitem(last=False)
+    return index
+
+
+def get_index(doc_id: str) -> Optional[DocumentIndex]:
+    index = _indexes.get(doc_id)
+    if index is not None:
+        _indexes.move_to_end(doc_id)
+        return index
+    # Evicted or built by another worker: rebuild from the document store.
+    text = document_store.get_text(doc_id)
+    if text is None:
+        logging.warning(f"No text available to index document {doc_id}")
+        return None
+    return index_document(doc_id, text)
+
+
+def select_context(doc_ids: list[str], question: str, top_k: int = TOP_K, token_budget: int = TOKEN_BUDGET) -> list[str]:
+    """Return the chunks most relevant to ``question`` across ``doc_ids``.
+
+    Chunks are taken in descending BM25 score until ``top_k`` chunks or
+    ``token_budget`` tokens have been used.
+    """
+    indexes = [index for index in map(get_index, dict.fromkeys(doc_ids)) if index is not None]
+    candidates = []
+    for index in indexes:
+        for score, chunk_id in index.search(question, top_k):
+            candidates.append((score, index.chunks[chunk_id]))
+    candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    if not candidates:
+        # Questions like "summarise this" share no terms with the text; fall
+        # back to the opening chunks of each document.
+        candidates = [(0.0, index.chunks[i]) for i in range(top_k) for index in indexes if i < len(index.chunks)]
+
+    selected = []
+    used = 0
+    for _, chunk in candidates[:top_k]:
+        tokens = count_tokens(chunk)
+        if used + tokens > token_budget:
+            continue
+        selected.append(chunk)
+        used += tokens
+    return selected
@@ -0,0 +1,75 @@
+import asyncio
+import os
+import time
+from typing import AsyncIterator
+
+FLUSH_BYTES = int(os.getenv("STREAM_FLUSH_BYTES", "256"))
+FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", "0.1"))
+TTFT_TIMEOUT = float(os.getenv("STREAM_TTFT_TIMEOUT", "30"))
+
+
+class FirstTokenTimeout(Exception):
+    pass
+
+
+async def stream_chat(client, model: str, messages: list, ttft_timeout: float = TTFT_TIMEOUT, **kwargs) -> AsyncIterator[str]:
+    """Yield content deltas from the Mistral async streaming API.
+
+    Raises ``FirstTokenTimeout`` when no content arrives within ``ttft_timeout``
+    seconds of the call, counting any time spent queued for a rate-limit slot,
+    retrying and opening the stream. The upstream HTTP stream is closed
+    whenever the consumer stops iterating, including on cancellation when the
+    client disconnects.
+    """
+    deadline = time.monotonic() + ttft_timeout
+    try:
+        response = await asyncio.wait_for(client.chat.stream_async(model=model, messages=messages, **kwargs), ttft_timeout)
+    except asyncio.TimeoutError:
+        raise FirstTokenTimeout(f"No tokens received within {ttft_timeout}s")
+    async with response as events:
+        iterator = events.__aiter__()
+        first = True
+        while True:
+            try:
+                if first:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise FirstTokenTimeout(f"No tokens received within {ttft_timeout}s")
+                    event = await asyncio.wait_for(iterator.__anext__(), remaining)
+                else:
+                    event = await iterator.__anext__()
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise FirstTokenTimeout(f"No tokens received within {ttft_timeout}s")
+            content = event.data.choices[0].delta.content if event.data.choices else None
+            if content:
+                first = False
+                yield content
+
+
+async def coalesce(deltas: AsyncIterator[str], max_bytes: int = FLUSH_BYTES, max_interval: float = FLUSH_INTERVAL) -> AsyncIterator[str]:
+    """Merge small deltas, flushing once ``max_bytes`` or ``max_interval`` is reached.
+
+    Closing the coalesced stream also closes ``deltas``, so abandoning it
+    tears down the upstream request.
+    """
+    buffer: list[str] = []
+    size = 0
+    last_flush = time.monotonic()
+    try:
+        async for delta in deltas:
+            buffer.append(delta)
+            size += len(delta.encode("utf-8"))
+            now = time.monotonic()
+            if size >= max_bytes or now - last_flush >= max_interval:
+                yield "".join(buffer)
+                buffer.clear()
+                size = 0
+                last_flush = now
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        aclose = getattr(deltas, "aclose", None)
+        if aclose is not None:
+            await aclose()
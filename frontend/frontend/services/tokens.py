@@ -0,0 +1,10 @@
+import math
+
+# Mistral's tokenizers average roughly four characters per token on English
+# course material; close enough for budgeting without loading a tokenizer.
+CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text: str) -> int:
+    """Approximate the number of model tokens in ``text``."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import uuid
+from typing import NamedTuple
+
+from frontend.services.files import evict_directory
+
+UPLOAD_DIR = "uploaded_files"
+SPOOL_DIR = os.path.join(UPLOAD_DIR, ".spool")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(100 * 1024 * 1024)))
+CHUNK_BYTES = 1024 * 1024
+# Spooled uploads are only read during extraction, whose results are cached
+# separately, so keep them just long enough for background extraction.
+UPLOAD_DIR_MAX_BYTES = int(os.getenv("UPLOAD_DIR_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_MAX_AGE_SECONDS = int(os.getenv("UPLOAD_MAX_AGE", str(24 * 3600)))
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class SpooledUpload(NamedTuple):
+    name: str
+    digest: str
+    path: str
+    size: int
+
+
+async def spool_upload(file, name: str, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """Stream an upload to disk in fixed-size chunks, hashing as it goes.
+
+    The file ends up at ``UPLOAD_DIR/<sha256><ext>``, so identical uploads are
+    stored once and users uploading different files under the same name no
+    longer overwrite each other. Memory use is bounded by ``CHUNK_BYTES``, and
+    the directory is bounded by age and total size like the extraction cache.
+    """
+    sha = hashlib.sha256()
+    size = 0
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    tmp_path = os.path.join(SPOOL_DIR, uuid.uuid4().hex)
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk := await file.read(CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"{name} is larger than the {max_bytes / (1024 * 1024):.0f} MB upload limit")
+                sha.update(chunk)
+                f.write(chunk)
+        digest = sha.hexdigest()
+        path = os.path.join(UPLOAD_DIR, digest + os.path.splitext(name)[1].lower())
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            # A repeat upload counts as fresh, so eviction cannot remove it mid-extraction.
+            os.utime(path)
+        else:
+            os.replace(tmp_path, path)
+        # Only spooled uploads are evicted; other files in the directory are left alone.
+        evict_directory(UPLOAD_DIR, UPLOAD_DIR_MAX_BYTES, UPLOAD_MAX_AGE_SECONDS, pattern=r"[0-9a-f]{64}(\.\w+)?")
+        return SpooledUpload(name, digest, path, size)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -1,49 +1,85 @@
 import reflex as rx
-import pdfplumber
 import os
-from typing import TypedDict
-import mistralai
+import asyncio
 import logging
+import time
+from contextlib import aclosing
 from dotenv import load_dotenv
+from frontend.services.classifier import CONFIDENCE_THRESHOLD, heuristic_classify
+from frontend.services.document_store import DocumentMeta, document_store
+from frontend.services.exam_jobs import MAX_EXAMS_PER_JOB, ExamJob, load_job, submit_job
+from frontend.services.extraction import iter_pages
+from frontend.services.extraction_cache import extraction_cache
+from frontend.services.llm import client
+from frontend.services.messages import ChatMessage
+from frontend.services.metrics import Trace
+from frontend.services.preprocess import normalize_pages
+from frontend.services.prompting import EXAM_PROMPT_VERSION, build_exam_prompt, system_prompt
+from frontend.services.question_bank import assemble_exam, bank_exam
+from frontend.services.response_cache import cache_key, response_cache
+from frontend.services.retrieval import index_document, select_context
+from frontend.services.streaming import coalesce, stream_chat
+from frontend.services.tokens import CHARS_PER_TOKEN, count_tokens
+from frontend.services.uploads import UploadTooLarge, spool_upload
 load_dotenv()
 
-client = mistralai.Mistral(api_key=os.getenv("MISTRAL_API_KEY"))
 model = "mistral-large-latest"
+# Cache-key version of the system message process_question sends with the excerpts.
+QUESTION_PROMPT_VERSION = "question-v1"
 
-UPLOAD_DIR = "uploaded_files"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-system_prompt = """
-You are an expert exam writer for a university course. Your task is to generate new exam questions based on provided course material and the style of previous exams.
-
-**Style Guidelines to Follow from Previous Exams:**
-*   **Tone:** {describe the tone, e.g., formal, precise, challenging}
-*   **Structure:** {describe the structure, e.g., "Section A: Multiple Choice, Section B: Short Answer, Section C: Essay"}
-*   **Question Phrasing:** {describe how questions are phrased, e.g., "Questions often start with 'Compare and contrast...', 'Explain the significance of...'"}
-*   **Difficulty Level:** {describe the difficulty, e.g., "Focus on application, not just memorization."}
-*   **Specific Instructions:** {include any specific instructions from the old exams, e.g., "Show all your work for full credit."}
-
-**Your Process:**
-1.  Analyze the provided course slides to understand the key topics and concepts.
-2.  Analyze the previous exams to understand the exact style, structure, and difficulty you must replicate.
-3.  Generate a new exam that comprehensively tests the material from the slides in the exact style of the previous exams.
-4.  **Most Importantly: DO NOT invent topics not covered in the provided slides.**
-"""
-'''
-user_prompt = f"""
-**COURSE SLIDES CONTENT:**
-{slides_text}
-
-**PREVIOUS EXAMS FOR STYLE REFERENCE:**
-{previous_exams_text}
-
-**TASK:**
-Based on the course slides above, and meticulously mimicking the style, structure, and difficulty of the previous exams provided, generate a complete new exam. The exam should cover the major topics from the slides.
-"""
-
-'''
-class ChatMessage(TypedDict):
-    role: str
-    content: str
+# Streamed exam text is sent to the browser in batches of ~512 bytes or 100 ms.
+UI_FLUSH_INTERVAL = 0.1
+UI_FLUSH_BYTES = 512
+
+# How often a page with a batch of exams in progress checks on the job.
+JOB_POLL_SECONDS = 2.0
+
+# Files from one drop that are saved, extracted and classified at the same time.
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+
+# Characters of a document needed before it can be classified.
+CLASSIFY_CHARS = 8000
+
+
+async def _finish_extraction(digest: str, head: list[str], batches, classification: str) -> None:
+    """Extract the pages after ``head`` and make the full document available to chat."""
+    trace = Trace("background_extraction")
+    pages = list(head)
+    try:
+        with trace.span("extract_rest"):
+            async with aclosing(batches) as rest:
+                async for batch in rest:
+                    pages.extend(batch)
+        # The cache keeps the raw pages, so normalisation can change without re-extracting.
+        extraction_cache.put(digest, pages, classification)
+        with trace.span("normalize"):
+            normalized = normalize_pages(pages, classification)
+        trace.normalized(normalized.tokens_before, normalized.tokens_after)
+        text = "\n".join(normalized.pages)
+        with trace.span("index"):
+            document_store.put(digest, text)
+            index_document(digest, text)
+    except Exception as e:
+        logging.exception(f"Background extraction of {digest} failed: {e}")
+    finally:
+        trace.log(pages=len(pages))
+
+
+def _job_messages(job: ExamJob) -> list[ChatMessage]:
+    if job["status"] == "interrupted":
+        return [{"role": "assistant", "content": "The server restarted before these exams were finished. Please generate them again."}]
+    messages: list[ChatMessage] = [
+        {"role": "assistant", "content": f"**Exam {index + 1} of {job['count']}**\n\n{exam}"}
+        for index, exam in enumerate(job["exams"])
+        if exam is not None
+    ]
+    if job["errors"]:
+        failed = job["count"] - len(messages)
+        messages.append(
+            {"role": "assistant", "content": f"{failed} of {job['count']} exams could not be generated: {'; '.join(job['errors'])}"}
+        )
+    return messages
 
 
 class State(rx.State):
@@ -57,12 +93,44 @@ class State(rx.State):
     processing: bool = False
     is_uploading: bool = False
     uploaded_pdf: str = ""
-    pdf_text: str = ""
-    slides_text: list[str] = []
-    exams_text: list[str] = []
+    # Only metadata lives in the state; the text itself is in the document store.
+    documents: list[DocumentMeta] = []
+    exams_generated: int = 0
+    # Assemble exams from previously generated questions where possible.
+    reuse_question_bank: bool = False
+    # Batch generation runs as an exam job; its ID is kept in the browser so a
+    # reload picks the job (or its finished exams) back up.
+    exam_count: int = 3
+    exam_job_id: str = rx.LocalStorage("", name="exam_job_id")
+    job_status: str = ""
+    job_completed: int = 0
+    job_count: int = 0
+    _polling_job: bool = False
+
+    def set_reuse_question_bank(self, value: bool):
+        self.reuse_question_bank = value
+
+    def set_exam_count(self, value: str):
+        try:
+            count = int(value)
+        except ValueError:
+            return
+        self.exam_count = max(1, min(count, MAX_EXAMS_PER_JOB))
+
+    @rx.var
+    def job_running(self) -> bool:
+        return self.job_status in ("queued", "running")
 
     async def classify_document(self, text : str) -> str:
-        """Uses the Mistral API to classify a document as 'slide' or 'test'."""
+        """Classifies a document as 'slide' or 'test'.
+
+        A local heuristic decides clear-cut documents; only low-confidence ones
+        are sent to the Mistral API, whose answer falls back to the heuristic's
+        best guess if it is unusable.
+        """
+        guess, confidence = heuristic_classify(text)
+        if confidence >= CONFIDENCE_THRESHOLD:
+            return guess
 
         prompt = f"""
         You are an expert document classifier. Your only task is to analyze the content from the file provided below and classify it into one of two categories:
@@ -78,14 +146,96 @@ class State(rx.State):
         **IMPORTANT:** Respond ONLY with the single, lowercase word "slide" or "test". Do not write any other text, explanations, or apologies.
         """
 
-        response = await client.chat.complete_async(
-            model="mistral-small-latest", # Perfectly sufficient for this task
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0 # Deterministic output
-        )
+        try:
+            response = await client.chat.complete_async(
+                model="mistral-small-latest", # Perfectly sufficient for this task
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.0 # Deterministic output
+            )
+            classification = response.choices[0].message.content.strip().lower()
+        except Exception as e:
+            logging.warning(f"LLM classification failed, using heuristic guess {guess!r}: {e}")
+            return guess
+        if classification not in ["slide", "test"]:
+            logging.warning(f"LLM returned {classification!r}, using heuristic guess {guess!r}")
+            return guess
+        return classification
+
+    async def _ingest_upload(self, file: rx.UploadFile) -> DocumentMeta | None:
+        """Save, extract, index and classify one upload without touching the state."""
+        trace = Trace("handle_upload", file=file.name)
+        outcome = "error"
+        try:
+            # Stream the upload to disk under its content hash
+            with trace.span("read_file"):
+                upload = await spool_upload(file, file.name)
+            digest = upload.digest
+            pending = document_store.pending(digest)
+            if pending is not None:
+                # The same file is still being extracted for an earlier upload; share it.
+                outcome = "pending"
+                return {**pending, "name": file.name}
+
+            # Repeat uploads of the same deck skip extraction and classification
+            cached = extraction_cache.get(digest)
+            classification = None
+            pages: list[str] = []
+            if cached is not None:
+                pages = cached["pages"]
+                classification = cached["classification"]
+            elif file.name.lower().endswith(".pdf"):
+                # Classify as soon as the opening pages are in and extract the
+                # rest in the background, so the upload returns in constant time.
+                batches = iter_pages(upload.path, engine="pdfplumber")
+                head: list[str] = []
+                with trace.span("extract_head"):
+                    async for batch in batches:
+                        head.extend(batch)
+                        if sum(len(page) for page in head) >= CLASSIFY_CHARS:
+                            break
+                text = "\n".join(head)
+                if not text:
+                    await batches.aclose()
+                    outcome = "empty"
+                    return None
+                with trace.span("classify"):
+                    classification = await self.classify_document(text[:CLASSIFY_CHARS])
+                pending = document_store.pending(digest)
+                if pending is not None:
+                    # A concurrent upload of the same file got here first.
+                    await batches.aclose()
+                    outcome = "pending"
+                    return {**pending, "name": file.name}
+                meta: DocumentMeta = {"id": digest, "name": file.name, "kind": classification, "chars": len(text)}
+                document_store.track(meta, asyncio.create_task(_finish_extraction(digest, head, batches, classification)))
+                logging.info(f"Classified {file.name} as {classification}")
+                outcome = "partial"
+                return meta
+            elif file.name.lower().endswith(".txt"):
+                with trace.span("read_text"):
+                    with open(upload.path, "r", encoding="utf-8") as f:
+                        pages = [f.read()]
+                extraction_cache.put(digest, pages)
 
-        classification = response.choices[0].message.content.strip().lower()
-        return classification if classification in ["slide", "test"] else "unknown"
+            with trace.span("normalize"):
+                normalized = normalize_pages(pages, classification)
+            trace.normalized(normalized.tokens_before, normalized.tokens_after)
+            text = "\n".join(normalized.pages)
+            if not text:
+                outcome = "empty"
+                return None
+            with trace.span("index"):
+                document_store.put(digest, text)
+                index_document(digest, text)
+            if classification is None:
+                with trace.span("classify"):
+                    classification = await self.classify_document(text[:CLASSIFY_CHARS])
+                extraction_cache.set_classification(digest, classification)
+            logging.info(f"Classified {file.name} as {classification}")
+            outcome = "cached" if cached is not None else "ok"
+            return {"id": digest, "name": file.name, "kind": classification, "chars": len(text)}
+        finally:
+            trace.log(outcome=outcome)
 
     async def handle_upload(self, files: list[rx.UploadFile]):
         if not files:
@@ -93,81 +243,104 @@ class State(rx.State):
             return
         self.is_uploading = True
         yield
-        try:
-            file = files[0]
-            
-            file_path = os.path.join(UPLOAD_DIR, file.name)
-            # Save the uploaded file to disk
-            with open(file_path, "wb") as f:
-                f.write(await file.read())
-            self.uploaded_pdf = file.name
-
-            # Optionally, extract text from PDF for later use
-            if file.name.lower().endswith(".pdf"):
-                try:
-                    with pdfplumber.open(file_path) as pdf:
-                        self.pdf_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
-                        classification = await self.classify_document(self.pdf_text[:8000])
-                        if classification == "slide":
-                            self.slides_text.append(self.pdf_text)
-                            print("Classified as slide")
-                        elif classification == "test":
-                            self.exams_text.append(self.pdf_text)
-                            print("Classified as test")
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
 
-                except Exception as e:
-                    logging.warning(f"Could not extract text from PDF: {e}")
-                    self.pdf_text = ""
-            elif file.name.lower().endswith(".txt"):
+        async def ingest(file: rx.UploadFile):
+            async with semaphore:
                 try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        self.pdf_text = f.read()
-                        classification = await self.classify_document(self.pdf_text[:8000])
-                        if classification == "slide":
-                            self.slides_text.append(self.pdf_text)
-                            print("Classified as slide (txt)")
-                        elif classification == "test":
-                            self.exams_text.append(self.pdf_text)
-                            print("Classified as test (txt)")
+                    return file, await self._ingest_upload(file), None
                 except Exception as e:
-                    logging.warning(f"Could not extract text from TXT: {e}")
-                    self.pdf_text = ""
-
-            self.chat_history.append(
-                {
-                    "role": "assistant",
-                    "content": f"Successfully uploaded {self.uploaded_pdf}. What would you like to know about it?",
-                }
-            )
-            yield rx.toast.success(f"Uploaded {file.name}")
-        except Exception as e:
-            logging.exception(f"Upload failed: {e}")
-            yield rx.toast.error("Upload failed. Please try again.")
+                    return file, None, e
+
+        try:
+            # Files are reported as they finish, so one slow or broken file
+            # neither delays nor aborts the rest of the drop.
+            for next_done in asyncio.as_completed([ingest(file) for file in files]):
+                file, doc, error = await next_done
+                if isinstance(error, UploadTooLarge):
+                    yield rx.toast.error(str(error))
+                    continue
+                if error is not None:
+                    logging.exception(f"Upload of {file.name} failed", exc_info=error)
+                    yield rx.toast.error(f"Upload of {file.name} failed. Please try again.")
+                    continue
+                self.uploaded_pdf = file.name
+                filed_as = ""
+                if doc is None:
+                    logging.warning(f"Could not extract text from {file.name}")
+                else:
+                    if all(existing["id"] != doc["id"] for existing in self.documents):
+                        self.documents.append(doc)
+                    filed_as = {"slide": " I've filed it as lecture slides.", "test": " I've filed it as a past exam."}.get(doc["kind"], "")
+                self.chat_history.append(
+                    {
+                        "role": "assistant",
+                        "content": f"Successfully uploaded {file.name}.{filed_as} What would you like to know about it?",
+                    }
+                )
+                yield rx.toast.success(f"Uploaded {file.name}")
         finally:
             self.is_uploading = False
 
+    async def _ready_documents(self, doc_ids: list[str]) -> list[str]:
+        """Wait for background extraction of ``doc_ids`` and drop any that failed.
+
+        Failed documents are removed from the session and reported in the
+        chat, rather than silently contributing no context.
+        """
+        await document_store.wait_ready(doc_ids)
+        failed = {doc_id for doc_id in doc_ids if not document_store.get_text(doc_id)}
+        if failed:
+            async with self:
+                names = [doc["name"] for doc in self.documents if doc["id"] in failed]
+                self.documents = [doc for doc in self.documents if doc["id"] not in failed]
+                self.chat_history.append(
+                    {
+                        "role": "assistant",
+                        "content": f"I couldn't read {', '.join(names)}, so I've left it out. Please upload it again.",
+                    }
+                )
+        return [doc_id for doc_id in doc_ids if doc_id not in failed]
+
     @rx.event(background=True)
     async def process_question(self):
         async with self:
-            self.chat_history.append({"role": "user", "content": self.current_question})
+            question = self.current_question
+            self.chat_history.append({"role": "user", "content": question})
             self.processing = True
             self.current_question = ""
         try:
-            if not self.pdf_text:
+            doc_ids = [doc["id"] for doc in self.documents]
+            trace = Trace("process_question")
+            with trace.span("wait_extraction"):
+                doc_ids = await self._ready_documents(doc_ids)
+            if not doc_ids:
                 response_content = "Please upload a PDF first."
             else:
-                completion = await client.chat.complete_async(
-                    model=model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": f"You are a helpful assistant. Use the following PDF content to answer the user's question and only use the pdf for it and If asked about anything outside dont answer with anything outside the PDF's scope. Content: {self.pdf_text}",
-                        },
-                        {"role": "user", "content": self.chat_history[-1]["content"]},
-                    ],
-                    temperature=0.2,
-                )
-                response_content = completion.choices[0].message.content
+                async def ask() -> str:
+                    with trace.span("prompt_assembly"):
+                        context = "\n\n---\n\n".join(select_context(doc_ids, question))
+                    trace.tokens(prompt=count_tokens(context) + count_tokens(question))
+                    completion_started = time.perf_counter()
+                    completion = await client.chat.complete_async(
+                        model=model,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": f"You are a helpful assistant. Use the following excerpts from the uploaded PDFs to answer the user's question and only use them for it and If asked about anything outside dont answer with anything outside the PDFs' scope. Content: {context}",
+                            },
+                            {"role": "user", "content": question},
+                        ],
+                        temperature=0.2,
+                    )
+                    trace.record("completion", time.perf_counter() - completion_started)
+                    reply = completion.choices[0].message.content
+                    trace.tokens(response=count_tokens(reply))
+                    return reply
+
+                key = cache_key(doc_ids, QUESTION_PROMPT_VERSION, model, 0.2, question)
+                response_content = await response_cache.complete(key, ask)
+                trace.log()
             async with self:
                 self.chat_history.append(
                     {"role": "assistant", "content": response_content}
@@ -193,39 +366,174 @@ class State(rx.State):
     @rx.event(background=True)
     async def generate_exam(self):
         async with self:
+            # The button can be clicked again before the disabled state reaches
+            # the browser; never run two generations for one session.
+            if self.processing:
+                return
             self.processing = True
+        # Uploads can add messages while the exam streams, so write to this
+        # message by index rather than to whatever is last.
+        placeholder = None
         try:
-            if not self.slides_text or not self.exams_text:
-                response_content = "Please upload both slides and previous exams before generating a new exam."
-            else:
-                completion = await client.chat.complete_async(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"""
-**COURSE SLIDES CONTENT:**
-{self.slides_text}
-
-**PREVIOUS EXAMS FOR STYLE REFERENCE:**
-{self.exams_text}
-
-**TASK:**
-Based on the course slides above, and meticulously mimicking the style, structure, and difficulty of the previous exams provided, generate a complete new exam. The exam should cover the major topics from the slides.
-"""}
-                    ],
-                    temperature=0.3,
-                )
-                response_content = completion.choices[0].message.content
+            slide_ids = [doc["id"] for doc in self.documents if doc["kind"] == "slide"]
+            exam_ids = [doc["id"] for doc in self.documents if doc["kind"] == "test"]
+            if not slide_ids or not exam_ids:
+                async with self:
+                    self.chat_history.append(
+                        {"role": "assistant", "content": "Please upload both slides and previous exams before generating a new exam."}
+                    )
+                return
             async with self:
-                self.chat_history.append(
-                    {"role": "assistant", "content": response_content}
+                self.chat_history.append({"role": "assistant", "content": ""})
+                placeholder = len(self.chat_history) - 1
+
+            trace = Trace("generate_exam", from_bank=self.reuse_question_bank)
+            with trace.span("wait_extraction"):
+                ready = await self._ready_documents(slide_ids + exam_ids)
+            slide_ids = [doc_id for doc_id in slide_ids if doc_id in ready]
+            exam_ids = [doc_id for doc_id in exam_ids if doc_id in ready]
+            if not slide_ids or not exam_ids:
+                async with self:
+                    self.chat_history[placeholder]["content"] = "Please upload both slides and previous exams before generating a new exam."
+                return
+
+            if self.reuse_question_bank:
+                with trace.span("assemble_from_bank"):
+                    exam = await assemble_exam(client, slide_ids, exam_ids)
+                trace.log()
+                async with self:
+                    self.chat_history[placeholder]["content"] = exam
+                    self.exams_generated += 1
+                return
+
+            async def produce():
+                with trace.span("prompt_assembly"):
+                    user_prompt = await build_exam_prompt(
+                        client, document_store.get_texts(slide_ids), document_store.get_texts(exam_ids)
+                    )
+                trace.tokens(prompt=count_tokens(system_prompt) + count_tokens(user_prompt))
+                messages = [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ]
+                async with aclosing(stream_chat(client, model, messages, temperature=0.3)) as deltas:
+                    async for delta in deltas:
+                        yield delta
+
+            # The n-th exam of a session is shared with everyone else's n-th exam
+            # from the same documents, so "generate again" still gives a new one.
+            key = cache_key(slide_ids + exam_ids, EXAM_PROMPT_VERSION, model, 0.3, f"variant-{self.exams_generated}")
+            # Each flush is one state delta over the websocket, so batch tokens
+            # rather than pushing one update per token.
+            exam = ""
+            async with aclosing(
+                coalesce(
+                    response_cache.stream(key, produce),
+                    max_bytes=UI_FLUSH_BYTES,
+                    max_interval=UI_FLUSH_INTERVAL,
                 )
+            ) as chunks:
+                stream_started = time.perf_counter()
+                first_chunk_at = None
+                async for text in chunks:
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter()
+                        trace.record("upstream_ttft", first_chunk_at - stream_started)
+                    exam += text
+                    async with self:
+                        self.chat_history[placeholder]["content"] += text
+                if first_chunk_at is not None:
+                    trace.record("streaming", time.perf_counter() - first_chunk_at)
+            trace.tokens(response=len(exam) // CHARS_PER_TOKEN)
+            with trace.span("bank_questions"):
+                await bank_exam(slide_ids, exam)
+            trace.log()
+            async with self:
+                self.exams_generated += 1
         except Exception as e:
             logging.exception(f"Error generating exam: {e}")
             async with self:
+                error = {"role": "assistant", "content": f"An error occurred: {str(e)}"}
+                if placeholder is not None and self.chat_history[placeholder]["content"] == "":
+                    self.chat_history[placeholder] = error
+                else:
+                    self.chat_history.append(error)
+        finally:
+            async with self:
+                self.processing = False
+
+    @rx.event(background=True)
+    async def submit_exam_job(self):
+        """Generate ``exam_count`` exams at once as a background exam job."""
+        async with self:
+            if self.processing or self.job_running:
+                return
+            self.processing = True
+        try:
+            slide_ids = [doc["id"] for doc in self.documents if doc["kind"] == "slide"]
+            exam_ids = [doc["id"] for doc in self.documents if doc["kind"] == "test"]
+            ready = await self._ready_documents(slide_ids + exam_ids)
+            slide_ids = [doc_id for doc_id in slide_ids if doc_id in ready]
+            exam_ids = [doc_id for doc_id in exam_ids if doc_id in ready]
+            if not slide_ids or not exam_ids:
+                async with self:
+                    self.chat_history.append(
+                        {"role": "assistant", "content": "Please upload both slides and previous exams before generating a new exam."}
+                    )
+                return
+            job = submit_job(slide_ids, exam_ids, self.exam_count, "bank" if self.reuse_question_bank else "generate")
+            async with self:
+                self.exam_job_id = job["id"]
+                self.job_status = job["status"]
+                self.job_completed = 0
+                self.job_count = job["count"]
                 self.chat_history.append(
-                    {"role": "assistant", "content": f"An error occurred: {str(e)}"}
+                    {
+                        "role": "assistant",
+                        "content": f"Generating {job['count']} exams. They will appear here when they are ready, even if you reload the page.",
+                    }
                 )
+        except Exception as e:
+            logging.exception(f"Error submitting exam job: {e}")
+            async with self:
+                self.chat_history.append({"role": "assistant", "content": f"An error occurred: {str(e)}"})
+            return
         finally:
             async with self:
-                self.processing = False
\ No newline at end of file
+                self.processing = False
+        yield State.poll_exam_job
+
+    @rx.event(background=True)
+    async def poll_exam_job(self):
+        """Follow the job in ``exam_job_id`` and post its exams once it finishes.
+
+        Also runs on page load, so a batch started before a reload still
+        reaches the chat.
+        """
+        async with self:
+            job_id = self.exam_job_id
+            if not job_id or self._polling_job:
+                return
+            self._polling_job = True
+        try:
+            while True:
+                job = load_job(job_id)
+                async with self:
+                    if self.exam_job_id != job_id:
+                        # A newer job replaced this one.
+                        return
+                    if job is None:
+                        self.exam_job_id = ""
+                        self.job_status = ""
+                        return
+                    self.job_status = job["status"]
+                    self.job_completed = job["completed"]
+                    self.job_count = job["count"]
+                    if not self.job_running:
+                        self.chat_history.extend(_job_messages(job))
+                        return
+                await asyncio.sleep(JOB_POLL_SECONDS)
+        finally:
+            async with self:
+                self._polling_job = False
+
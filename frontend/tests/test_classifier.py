@@ -0,0 +1,50 @@
+import unittest
+
+from frontend.services.classifier import CONFIDENCE_THRESHOLD, heuristic_classify
+
+EXAM = """Midterm Exam - Databases (90 minutes)
+Name: ________  Student ID: ________
+Question 1 (10 points) Explain why two-phase locking guarantees serializability.
+Question 2 (5 points) Which isolation level prevents phantom reads?
+a) Read committed
+b) Repeatable read
+c) Serializable
+d) None of the above
+3. What is a write-ahead log used for?
+"""
+
+SLIDES = """Lecture 4: Concurrency Control
+Outline
+- Locks and lock modes
+- Two-phase locking
+- Deadlock detection
+Summary
+- 2PL guarantees conflict serializability
+- Strict 2PL avoids cascading aborts
+"""
+
+
+class HeuristicClassifyTest(unittest.TestCase):
+    def test_exam_is_a_confident_test(self):
+        label, confidence = heuristic_classify(EXAM)
+        self.assertEqual(label, "test")
+        self.assertGreaterEqual(confidence, CONFIDENCE_THRESHOLD)
+
+    def test_slides_are_confident_slides(self):
+        label, confidence = heuristic_classify(SLIDES)
+        self.assertEqual(label, "slide")
+        self.assertGreaterEqual(confidence, CONFIDENCE_THRESHOLD)
+
+    def test_review_slides_full_of_questions_are_left_to_the_llm(self):
+        for text in (
+            "Review\n- Which lock mode allows concurrent reads?\n- When does 2PL deadlock?",
+            "Recap: what is a deadlock?\n- cycle in the wait-for graph",
+            "",
+        ):
+            with self.subTest(text=text):
+                _, confidence = heuristic_classify(text)
+                self.assertLess(confidence, CONFIDENCE_THRESHOLD)
+
+
+if __name__ == "__main__":
+    unittest.main()
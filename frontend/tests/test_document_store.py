@@ -0,0 +1,55 @@
+import asyncio
+import tempfile
+import unittest
+
+from frontend.services.document_store import DocumentMeta, DocumentStore
+
+DOC_ID = "ab" * 32
+
+
+def meta(name: str) -> DocumentMeta:
+    return {"id": DOC_ID, "name": name, "kind": "slide", "chars": 10}
+
+
+class DocumentStoreTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = DocumentStore(directory.name)
+
+    async def test_pending_extraction_is_shared_until_it_finishes(self):
+        release = asyncio.Event()
+
+        async def extract():
+            await release.wait()
+            self.store.put(DOC_ID, "extracted text")
+
+        self.store.track(meta("deck.pdf"), asyncio.create_task(extract()))
+        self.assertEqual(self.store.pending(DOC_ID)["name"], "deck.pdf")
+
+        release.set()
+        await self.store.wait_ready([DOC_ID])
+        await asyncio.sleep(0)
+        self.assertIsNone(self.store.pending(DOC_ID))
+        self.assertEqual(self.store.get_text(DOC_ID), "extracted text")
+
+    async def test_finished_task_does_not_forget_a_newer_one(self):
+        first = asyncio.create_task(asyncio.sleep(0))
+        second = asyncio.create_task(asyncio.Event().wait())
+        self.store.track(meta("first.pdf"), first)
+        self.store.track(meta("second.pdf"), second)
+
+        await first
+        await asyncio.sleep(0)
+        self.assertEqual(self.store.pending(DOC_ID)["name"], "second.pdf")
+        second.cancel()
+
+    async def test_rejects_ids_that_are_not_digests(self):
+        for doc_id in ("../../etc/passwd", "AB" * 32, "ab" * 31):
+            with self.subTest(doc_id=doc_id), self.assertRaises(ValueError):
+                self.store.get_text(doc_id)
+        self.assertIsNone(self.store.get_text("cd" * 32))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import asyncio
+import unittest
+from contextlib import aclosing
+from unittest import mock
+
+from frontend.services import extraction
+
+
+class FakePool:
+    """Runs submitted calls in-process, recording them, instead of in worker processes."""
+
+    def __init__(self, pages: int, hang: bool = False):
+        self.pages = pages
+        self.hang = hang
+        self.calls: list[str] = []
+
+    def submit(self, fn, *args):
+        self.calls.append(fn.__name__)
+        future = asyncio.get_running_loop().create_future()
+        if fn is extraction._page_count:
+            future.set_result(self.pages)
+        elif not self.hang:
+            _, _, start, stop = args
+            future.set_result([f"page {i}" for i in range(start, stop)])
+        return self, None, future
+
+
+class IterPagesTest(unittest.IsolatedAsyncioTestCase):
+    def patch(self, pool: FakePool, prefetch: int = 2) -> None:
+        for name, value in [("_submit", pool.submit), ("PREFETCH_RANGES", prefetch), ("FIRST_BATCH_PAGES", 5), ("PAGES_PER_TASK", 25)]:
+            patcher = mock.patch.object(extraction, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_small_first_batch_then_fixed_ranges_in_order(self):
+        self.patch(FakePool(pages=60))
+        batches = [batch async for batch in extraction.iter_pages("deck.pdf")]
+        self.assertEqual([len(batch) for batch in batches], [5, 25, 25, 5])
+        self.assertEqual([page for batch in batches for page in batch], [f"page {i}" for i in range(60)])
+
+    async def test_ranges_are_submitted_lazily(self):
+        pool = FakePool(pages=130)
+        self.patch(pool, prefetch=2)
+        submitted = []
+        async with aclosing(extraction.iter_pages("deck.pdf")) as batches:
+            async for _ in batches:
+                submitted.append(len(pool.calls))
+        # The page count and the first range go alone; after that at most
+        # PREFETCH_RANGES ranges are queued ahead of the consumer.
+        self.assertEqual(submitted, [2, 4, 5, 6, 7, 7])
+
+    async def test_stops_at_max_pages(self):
+        self.patch(FakePool(pages=1000))
+        pages = await extraction.extract_pages("deck.pdf", max_pages=40)
+        self.assertEqual(pages, [f"page {i}" for i in range(40)])
+
+    async def test_empty_document_yields_nothing(self):
+        self.patch(FakePool(pages=0))
+        self.assertEqual(await extraction.extract_pages("empty.pdf"), [])
+
+    async def test_timeout_retires_the_pool(self):
+        pool = FakePool(pages=10, hang=True)
+        self.patch(pool)
+        with mock.patch.object(extraction, "_retire_pool") as retire:
+            with self.assertRaises(extraction.ExtractionError):
+                await extraction.extract_pages("deck.pdf", timeout=0.05)
+        retire.assert_called_once()
+        self.assertIs(retire.call_args.args[0], pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
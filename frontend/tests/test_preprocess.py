@@ -0,0 +1,83 @@
+import unittest
+
+from frontend.services.preprocess import normalize_pages
+
+
+def mcq_exam(questions: int) -> list[str]:
+    return [
+        f"Question {n}. Which statement about topic {n} is correct?\n"
+        f"a) First claim about {n}\n"
+        f"b) Second claim about {n}\n"
+        f"c) Third claim about {n}\n"
+        "d) None of the above"
+        for n in range(1, questions + 1)
+    ]
+
+
+class NormalizePagesTest(unittest.TestCase):
+    def test_keeps_answer_options_repeated_on_every_exam_page(self):
+        pages = mcq_exam(8)
+        for kind in ("test", None):
+            with self.subTest(kind=kind):
+                normalized = normalize_pages(pages, kind).pages
+                self.assertEqual(len(normalized), 8)
+                for page in normalized:
+                    self.assertTrue(page.endswith("d) None of the above"), page)
+
+    def test_keeps_repeated_exam_lines_that_are_not_options(self):
+        pages = [f"Name: ____\nExplain concept {n} in detail.\nUse the space below.\nUse the space below.\nStudent ID: ____" for n in range(6)]
+        for page in normalize_pages(pages, "test").pages:
+            self.assertIn("Name: ____", page)
+            self.assertIn("Student ID: ____", page)
+
+    def test_collapses_a_short_build_without_losing_its_title(self):
+        pages = [
+            "Two-phase locking\n- growing phase",
+            "Two-phase locking\n- growing phase\n- shrinking phase",
+            "Two-phase locking\n- growing phase\n- shrinking phase\n- strict 2PL",
+            "Deadlocks\n- wait-for graph",
+            "Recovery\n- write-ahead log",
+        ]
+        self.assertEqual(
+            normalize_pages(pages, "slide").pages,
+            [
+                "Two-phase locking\n- growing phase\n- shrinking phase\n- strict 2PL",
+                "Deadlocks\n- wait-for graph",
+                "Recovery\n- write-ahead log",
+            ],
+        )
+
+    def test_collapses_builds_whose_footers_are_numbered(self):
+        pages = [
+            "Indexes\n- B-trees\nCS 340 Databases\nLecture 3 - 1/3",
+            "Indexes\n- B-trees\n- hash indexes\nCS 340 Databases\nLecture 3 - 2/3",
+            "Joins\n- nested loops\nCS 340 Databases\nLecture 3 - 3/3",
+        ]
+        self.assertEqual(
+            normalize_pages(pages, "slide").pages,
+            [
+                "Indexes\n- B-trees\n- hash indexes\nCS 340 Databases\nLecture 3 - 2/3",
+                "Joins\n- nested loops\nCS 340 Databases\nLecture 3 - 3/3",
+            ],
+        )
+
+    def test_strips_headers_footers_and_page_numbers_from_slides(self):
+        topics = ["Transactions", "Locking", "Logging", "Recovery", "Replication"]
+        pages = [
+            f"CS 340 Databases\n{topic}\n- first point on {topic}\n- second point on {topic}\nLecture 7 - {n + 1}/5\n{n + 1}"
+            for n, topic in enumerate(topics)
+        ]
+        normalized = normalize_pages(pages, "slide")
+        self.assertEqual(
+            normalized.pages,
+            [f"{topic}\n- first point on {topic}\n- second point on {topic}" for topic in topics],
+        )
+        self.assertLess(normalized.tokens_after, normalized.tokens_before)
+
+    def test_collapses_whitespace_and_drops_duplicate_pages(self):
+        pages = ["Normal forms \t and keys", "Normal forms and keys", "BCNF\n\n  - lossless join  "]
+        self.assertEqual(normalize_pages(pages).pages, ["Normal forms and keys", "BCNF\n- lossless join"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from frontend.services.question_bank import QuestionBank, _similarity, parse_questions, signature
+
+
+class ParseQuestionsTest(unittest.TestCase):
+    def test_numbered_sub_parts_stay_with_their_question(self):
+        markdown = (
+            "**Question 1.** What is a transaction in a database?\n"
+            "**Question 2.** Explain the two-phase commit protocol.\n"
+            "1. first step\n"
+            "2. second step\n"
+            "3. third step\n"
+            "**Question 3.** Define a deadlock and its causes."
+        )
+        self.assertEqual(
+            parse_questions(markdown),
+            [
+                "What is a transaction in a database?",
+                "Explain the two-phase commit protocol.\n1. first step\n2. second step\n3. third step",
+                "Define a deadlock and its causes.",
+            ],
+        )
+
+    def test_bare_numbering_splits_questions(self):
+        markdown = (
+            "1. What is a transaction in a database?\n"
+            "a) A unit of work\n"
+            "b) A table\n"
+            "2) Explain the two-phase commit protocol.\n"
+            "**3.** Define a deadlock and its causes."
+        )
+        self.assertEqual(
+            parse_questions(markdown),
+            [
+                "What is a transaction in a database?\na) A unit of work\nb) A table",
+                "Explain the two-phase commit protocol.",
+                "Define a deadlock and its causes.",
+            ],
+        )
+
+    def test_bare_number_continuing_labelled_numbering_starts_a_question(self):
+        markdown = "**Question 1.** What is a transaction in a database?\n2. Explain the two-phase commit protocol."
+        self.assertEqual(
+            parse_questions(markdown),
+            ["What is a transaction in a database?", "Explain the two-phase commit protocol."],
+        )
+
+    def test_sections_end_questions_and_short_fragments_are_dropped(self):
+        markdown = (
+            "# Midterm exam\n"
+            "## Question 1: What is a transaction in a database?\n"
+            "## Answer key\n"
+            "1. A unit of work.\n"
+            "### Q2) Ok?"
+        )
+        self.assertEqual(parse_questions(markdown), ["What is a transaction in a database?", "A unit of work."])
+
+
+class QuestionBankTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.bank = QuestionBank(os.path.join(directory.name, "bank.db"))
+
+    def test_signature_similarity_tracks_overlap(self):
+        question = "Explain how the two-phase commit protocol handles a coordinator failure during the prepare phase."
+        reworded = "Explain how the two-phase commit protocol handles a coordinator failure during the voting phase."
+        unrelated = "Describe the differences between B-tree and hash indexes for range queries on large tables."
+        self.assertEqual(_similarity(signature(question), signature(question)), 1.0)
+        self.assertGreater(_similarity(signature(question), signature(reworded)), 0.5)
+        self.assertLess(_similarity(signature(question), signature(unrelated)), 0.2)
+
+    def test_add_skips_near_duplicates_within_a_course(self):
+        question = "Explain how the two-phase commit protocol handles a coordinator failure during the prepare phase."
+        self.assertEqual(self.bank.add("course", [("topic", question), ("topic", question + " ")]), 1)
+        self.assertEqual(self.bank.add("course", [("other", question)]), 0)
+        self.assertEqual(self.bank.add("another-course", [("topic", question)]), 1)
+        self.assertEqual(self.bank.by_topic("course"), {"topic": [question]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+
+from frontend.services.replay import Event, ReplayGap, ReplayStore
+
+
+async def chunks(*texts: str):
+    for text in texts:
+        yield text
+
+
+async def collect(store: ReplayStore, generation_id: str, last_event_id: int = 0) -> list[Event]:
+    return [event async for event in store.events(generation_id, last_event_id) if event is not None]
+
+
+class ReplayStoreEventsTest(unittest.IsolatedAsyncioTestCase):
+    def store(self, **kwargs) -> ReplayStore:
+        store = ReplayStore(**kwargs)
+        self.addCleanup(lambda: store._sweeper and store._sweeper.cancel())
+        return store
+
+    async def test_replays_every_event_then_resumes_after_last_seen(self):
+        store = self.store()
+        generation_id = store.start(lambda: chunks("a", "b"))
+
+        events = await collect(store, generation_id)
+        self.assertEqual(
+            events,
+            [
+                Event(1, "generation", generation_id),
+                Event(2, "chunk", "a"),
+                Event(3, "chunk", "b"),
+                Event(4, "done", ""),
+            ],
+        )
+        # A reconnecting client only gets what it missed.
+        self.assertEqual(await collect(store, generation_id, 2), events[2:])
+        self.assertEqual(await collect(store, generation_id, 4), [])
+
+    async def test_gap_when_requested_events_left_the_buffer(self):
+        store = self.store(max_events=3)
+        generation_id = store.start(lambda: chunks("a", "b", "c", "d", "e"))
+        # Wait for the generation to finish without reading events, so the
+        # buffer is left holding only its last three.
+        async with asyncio.timeout(5):
+            while not store._generations[generation_id].done:
+                await asyncio.sleep(0)
+
+        with self.assertRaises(ReplayGap):
+            await collect(store, generation_id, 1)
+        self.assertEqual(
+            await collect(store, generation_id, 4),
+            [Event(5, "chunk", "d"), Event(6, "chunk", "e"), Event(7, "done", "")],
+        )
+
+    async def test_idle_generation_is_cancelled_and_dropped(self):
+        store = self.store(idle_ttl=0.2)
+        cancelled = asyncio.Event()
+
+        async def forever():
+            try:
+                await asyncio.Event().wait()
+                yield ""
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        generation_id = store.start(forever)
+        await asyncio.wait_for(cancelled.wait(), 2)
+        self.assertFalse(store.exists(generation_id))
+        with self.assertRaises(KeyError):
+            await collect(store, generation_id)
+
+    async def test_generation_with_a_subscriber_is_kept(self):
+        store = self.store(idle_ttl=0.2)
+        generation_id = store.start(lambda: chunks())
+        events = store.events(generation_id)
+        self.assertEqual((await anext(events)).event, "generation")
+
+        await asyncio.sleep(0.5)
+        self.assertTrue(store.exists(generation_id))
+        await events.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
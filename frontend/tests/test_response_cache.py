@@ -0,0 +1,117 @@
+import asyncio
+import unittest
+
+from frontend.services.response_cache import ResponseCache
+
+
+class Upstream:
+    """Fake upstream call that yields chunks only when the test releases them."""
+
+    def __init__(self, chunks: list[str], error: Exception | None = None):
+        self.chunks = chunks
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def produce(self):
+        self.calls += 1
+        try:
+            for chunk in self.chunks:
+                await self.release.wait()
+                self.release.clear()
+                yield chunk
+            if self.error is not None:
+                await self.release.wait()
+                raise self.error
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def collect(stream) -> list[str]:
+    return [chunk async for chunk in stream]
+
+
+class ResponseCacheStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def release_all(self, upstream: Upstream, tasks: list[asyncio.Task]) -> None:
+        async with asyncio.timeout(5):
+            while not all(task.done() for task in tasks):
+                upstream.release.set()
+                await asyncio.sleep(0)
+
+    async def test_concurrent_requests_share_one_upstream_call(self):
+        cache = ResponseCache()
+        upstream = Upstream(["a", "b", "c"])
+        first = asyncio.create_task(collect(cache.stream("key", upstream.produce)))
+        second = asyncio.create_task(collect(cache.stream("key", upstream.produce)))
+        await self.release_all(upstream, [first, second])
+
+        self.assertEqual(await first, ["a", "b", "c"])
+        self.assertEqual(await second, ["a", "b", "c"])
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(cache.get("key"), "abc")
+
+    async def test_late_joiner_replays_from_the_start(self):
+        cache = ResponseCache()
+        upstream = Upstream(["a", "b"])
+        first = cache.stream("key", upstream.produce)
+        upstream.release.set()
+        self.assertEqual(await anext(first), "a")
+
+        late = asyncio.create_task(collect(cache.stream("key", upstream.produce)))
+        rest = asyncio.create_task(collect(first))
+        await self.release_all(upstream, [late, rest])
+
+        self.assertEqual(await late, ["a", "b"])
+        self.assertEqual(await rest, ["b"])
+        self.assertEqual(upstream.calls, 1)
+
+    async def test_upstream_is_cancelled_once_every_subscriber_leaves(self):
+        cache = ResponseCache()
+        upstream = Upstream(["a", "b"])
+        first = cache.stream("key", upstream.produce)
+        second = cache.stream("key", upstream.produce)
+        upstream.release.set()
+        self.assertEqual(await anext(first), "a")
+        self.assertEqual(await anext(second), "a")
+
+        await first.aclose()
+        await asyncio.sleep(0)
+        self.assertFalse(upstream.cancelled)
+
+        await second.aclose()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertTrue(upstream.cancelled)
+        self.assertIsNone(cache.get("key"))
+
+        # A new request after the teardown starts a fresh call.
+        again = asyncio.create_task(collect(cache.stream("key", upstream.produce)))
+        await self.release_all(upstream, [again])
+        self.assertEqual(await again, ["a", "b"])
+        self.assertEqual(upstream.calls, 2)
+
+    async def test_upstream_error_reaches_every_subscriber(self):
+        cache = ResponseCache()
+        upstream = Upstream(["a"], error=RuntimeError("upstream failed"))
+
+        async def subscriber() -> list[str]:
+            received = []
+            with self.assertRaisesRegex(RuntimeError, "upstream failed"):
+                async for chunk in cache.stream("key", upstream.produce):
+                    received.append(chunk)
+            return received
+
+        first = asyncio.create_task(subscriber())
+        second = asyncio.create_task(subscriber())
+        await self.release_all(upstream, [first, second])
+
+        self.assertEqual(await first, ["a"])
+        self.assertEqual(await second, ["a"])
+        self.assertEqual(upstream.calls, 1)
+        self.assertIsNone(cache.get("key"))
+
+
+if __name__ == "__main__":
+    unittest.main()
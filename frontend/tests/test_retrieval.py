@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from frontend.services import retrieval
+from frontend.services.document_store import DocumentStore
+from frontend.services.retrieval import DocumentIndex, chunk_text, select_context
+
+SECTIONS = [
+    "Two-phase locking acquires every lock before releasing any, which guarantees conflict serializability.",
+    "A write-ahead log records each change before the data page is written, so committed work survives a crash.",
+    "B-tree indexes keep keys sorted, so range queries and ordered scans are cheap.",
+]
+
+
+class ChunkTextTest(unittest.TestCase):
+    def test_chunks_are_bounded_and_overlap(self):
+        text = " ".join(f"word{i}" for i in range(2000))
+        chunks = chunk_text(text, chunk_chars=500, overlap=100)
+        self.assertTrue(all(len(chunk) <= 500 for chunk in chunks))
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertIn(chunk[:50], previous)
+        self.assertTrue(chunks[-1].endswith("word1999"))
+
+    def test_prefers_paragraph_breaks(self):
+        text = "\n\n".join(section * 3 for section in SECTIONS)
+        chunks = chunk_text(text, chunk_chars=len(SECTIONS[0]) * 3 + 50, overlap=0)
+        self.assertEqual(chunks[0], SECTIONS[0] * 3)
+
+    def test_empty_text_has_no_chunks(self):
+        self.assertEqual(chunk_text("  \n "), [])
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(retrieval._indexes, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bm25_ranks_the_matching_chunk_first(self):
+        index = DocumentIndex(SECTIONS)
+        self.assertEqual(index.search("how does the write-ahead log survive a crash?")[0][1], 1)
+        self.assertEqual(index.search("quantum chromodynamics"), [])
+
+    def test_select_context_respects_the_token_budget(self):
+        retrieval._indexes["small"] = DocumentIndex(SECTIONS)
+        self.assertEqual(select_context(["small"], "write-ahead log crash", top_k=1), [SECTIONS[1]])
+        self.assertEqual(select_context(["small"], "write-ahead log crash", token_budget=1), [])
+
+    def test_unmatched_question_falls_back_to_opening_chunks(self):
+        retrieval._indexes["small"] = DocumentIndex(SECTIONS)
+        self.assertEqual(select_context(["small"], "summarise this", top_k=2), SECTIONS[:2])
+
+    def test_evicted_index_is_rebuilt_from_the_document_store(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = DocumentStore(directory.name)
+        doc_id = "ab" * 32
+        store.put(doc_id, "\n\n".join(SECTIONS))
+        with mock.patch.object(retrieval, "document_store", store):
+            self.assertEqual(select_context([doc_id], "B-tree range queries", top_k=1), ["\n\n".join(SECTIONS)])
+            self.assertIsNone(retrieval.get_index("cd" * 32))
+
+
+if __name__ == "__main__":
+    unittest.main()